@@ -1,27 +1,55 @@
 """Support for monitoring Duet 3D printers."""
+import contextlib
+import hashlib
+import json
 import logging
-import requests
+import time
 import voluptuous as vol
 import aiohttp
 import asyncio
 import async_timeout
+from collections import deque
 import homeassistant.helpers.config_validation as cv
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.util import slugify as util_slugify
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.exceptions import ConfigEntryNotReady
 import homeassistant.util.dt as dt_util
 from typing import cast
+from urllib.parse import quote
 from yarl import URL
 
 from datetime import timedelta
 
 
+from .custom_sensors import get_custom_sensor_types, parse_custom_sensors
+from .discovery import async_read_model, build_capabilities
+from .dsf import DsfCommandClient, DsfError, async_subscribe
+from .file_info import FileInfoCache
+from .file_list import FileListing
+from .heightmap import process_heightmap
+from .layers import LayerHistory
+from .metrics import DuetMetricsView
+from .print_history import PrintHistory
+from .model import (
+    get_json_value,
+    get_minimal_keys,
+    has_json_key,
+    is_covered,
+    set_json_value,
+)
+from .query import get_query_key
+from .request_gate import DuetRequestGate
+from .toolpath import ToolpathTrace
+from .transfer import get_sbc_file_url
 from .services import async_register_services
 
 from homeassistant.const import (
@@ -36,17 +64,66 @@ from .const import (
     CONF_NUMBER_OF_TOOLS,
     CONF_SBC_STATUS_PATH,
     CONF_SBC_API,
+    CONF_SBC_MODEL_FLAGS,
+    CONF_ARRAY_RANGE_FLAGS,
     CONF_STANDALONE_API,
     CONF_STANDALONE,
+    CONF_STANDALONE_GCODE_PATH,
+    CONF_STANDALONE_REPLY_PATH,
+    CONF_STANDALONE_FILEINFO_PATH,
+    CONF_STANDALONE_THUMBNAIL_PATH,
+    CONF_SBC_FILEINFO_PATH,
+    CONF_SBC_DIRECTORY_PATH,
+    CONF_STANDALONE_FILELIST_PATH,
+    GCODES_DIRECTORY,
+    SYS_DIRECTORY,
+    CONF_STANDALONE_DOWNLOAD_PATH,
+    FILE_IDENTITY_SENSOR_TYPES,
+    PRIORITY_THUMBNAIL,
+    EVENT_MESSAGE,
+    MESSAGE_BUFFER_SIZE,
+    MESSAGE_TYPE_ERROR,
+    MESSAGE_TYPE_SUCCESS,
+    MESSAGE_TYPE_WARNING,
+    MESSAGE_TYPES,
+    CONF_SBC_GCODE_PATH,
+    CONF_TEXT_PLAIN_HEADER,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    CONF_DSF_SOCKET,
+    DSF_SOCKET_PATH,
+    CONF_CUSTOM_SENSORS,
+    CONF_CAPABILITIES,
+    LIVE_OPTIONS,
+    SIGNAL_OPTIONS_UPDATED,
+    API_SBC,
+    API_STANDALONE,
+    PRIORITY_GCODE,
+    PRIORITY_STATUS,
+    REQUEST_RETRIES,
+    REQUEST_RETRY_BACKOFF,
+    TRANSFER_READ_TIMEOUT,
+    MAX_CONCURRENT_DOWNLOADS,
+    MAX_CONCURRENT_UPLOADS,
+    MAX_FILE_OPTIONS,
+    COMMAND_REFRESH_DELAY,
+    QUERY_KEY_TTL,
     CONF_BED,
     DOMAIN,
     CONF_INTERVAL,
     SENSOR_TYPES,
-    CONF_JSON_HEADER
+    CONF_JSON_HEADER,
+    CONF_ACCEPT_GZIP_HEADER,
 )
 
 _LOGGER = logging.getLogger(__name__)
-PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR, Platform.LIGHT, Platform.CAMERA]
+PLATFORMS = [
+    Platform.BINARY_SENSOR,
+    Platform.SENSOR,
+    Platform.LIGHT,
+    Platform.CAMERA,
+    Platform.SELECT,
+]
 
 
 def has_all_unique_names(value):
@@ -66,13 +143,10 @@ def ensure_valid_path(value):
     return value
 
 
-async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
-
-
 async def async_setup(hass, config):
     """Legacy way to set up Duet3D component from YAML."""
+    # one view serves the metrics of all printers
+    hass.http.register_view(DuetMetricsView(hass))
     return True
 
 
@@ -97,23 +171,57 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
                 coordinator.board_model = board_model["result"]
             except (KeyError, TypeError):
                 _LOGGER.error("Failed to extract data for sensor")
+        elif coordinator.dsf is not None:
+            _LOGGER.info("Using the DSF socket %s", DSF_SOCKET_PATH)
+            coordinator.model = await coordinator.dsf.async_get_object_model()
+            coordinator.data["status"] = coordinator.model
+            coordinator.firmware_version = coordinator.get_value_from_json(
+                coordinator.model, "boards", "software", "firmwareVersion", None
+            )
+            coordinator.board_model = coordinator.get_value_from_json(
+                coordinator.model, "boards", "software", "model", None
+            )
         else:
-            coordinator.data["status"] = await coordinator.get_status()
+            boards = await coordinator.async_detect_sbc_keyed_queries()
+            if boards is not None:
+                board_status = {"boards": boards}
+            else:
+                coordinator.data["status"] = await coordinator.get_status()
+                board_status = coordinator.data["status"]
             coordinator.firmware_version = coordinator.get_value_from_json(
-                coordinator.data["status"],
+                board_status,
                 "boards",
                 "software",
                 "firmwareVersion",
                 None,
             )
             coordinator.board_model = coordinator.get_value_from_json(
-                coordinator.data["status"], "boards", "software", "model", None
+                board_status, "boards", "software", "model", None
             )
 
-    except requests.exceptions.RequestException as conn_err:
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError, DsfError) as conn_err:
         _LOGGER.error("Error setting up Duet API: %r", conn_err)
         coordinator.printer_online = False
         raise ConfigEntryNotReady from conn_err
+    if coordinator.needs_capability_probe():
+        try:
+            capabilities = await coordinator.async_probe_capabilities()
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ConfigEntryNotReady,
+            UpdateFailed,
+        ) as err:
+            _LOGGER.warning("Could not probe the object model keys: %r", err)
+        else:
+            coordinator.set_capabilities(capabilities)
+            # before the update listener is added, this does not reload the entry
+            hass.config_entries.async_update_entry(
+                config_entry,
+                data={**config_entry.data, CONF_CAPABILITIES: capabilities},
+            )
+    await coordinator.file_info.async_load()
+    await coordinator.print_history.async_load()
     hass.data[DOMAIN][config_entry.entry_id] = {"coordinator": coordinator}
 
     # register Duet3D API services
@@ -121,12 +229,44 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
     config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
+    config_entry.async_on_unload(coordinator.refresh_debouncer.async_cancel)
+    if coordinator.dsf is not None:
+        config_entry.async_on_unload(coordinator.dsf.async_close)
+        config_entry.async_create_background_task(
+            hass,
+            async_subscribe(
+                DSF_SOCKET_PATH,
+                lambda: get_minimal_keys(coordinator.get_fetch_plan().values()),
+                coordinator.async_handle_dsf_model,
+                coordinator.async_set_update_error,
+            ),
+            f"duet3d-{config_entry.entry_id}-dsf-subscription",
+        )
     return True
 
 
 async def update_listener(hass, entry):
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed options in place, reload if anything else changed.
+
+    Interval, bed, light and the request limit keep the coordinator and
+    its caches running, the connection settings, the mode and the custom
+    sensors need a reload.
+    """
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    previous, coordinator.entry_data = coordinator.entry_data, dict(entry.data)
+    # the options flow writes "" and False for settings older entries lack
+    changed = {
+        key
+        for key in previous.keys() | entry.data.keys()
+        if (previous.get(key) or None) != (entry.data.get(key) or None)
+    }
+    if changed - LIVE_OPTIONS:
+        await hass.config_entries.async_reload(entry.entry_id)
+    elif changed:
+        coordinator.async_apply_options()
+        if CONF_INTERVAL in changed and coordinator.dsf is None:
+            # polls now so the next one is scheduled with the new interval
+            await coordinator.async_request_refresh()
 
 
 async def async_unload_entry(hass, entry):
@@ -137,6 +277,19 @@ async def async_unload_entry(hass, entry):
     return unload_ok
 
 
+async def async_remove_entry(hass, entry):
+    """Delete the files stored for a removed config entry."""
+    await PrintHistory(hass, entry.entry_id).async_remove()
+    await FileInfoCache(hass, entry.entry_id).async_remove()
+
+
+def _lacks_thumbnail_data(file_info):
+    """Return True if a thumbnail of a file info has no image data."""
+    return any(
+        thumbnail.get("data") is None for thumbnail in file_info.get("thumbnails") or []
+    )
+
+
 class DuetDataUpdateCoordinator(DataUpdateCoordinator):
     def __init__(
         self, hass: HomeAssistant, config_entry: ConfigEntry, interval: int
@@ -147,10 +300,13 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER,
             name=f"duet3d-{config_entry.entry_id}",
             update_interval=timedelta(seconds=interval),
+            always_update=False,
         )
         self.data = {"status": None, "last_read_time": None}
         self.interval = interval
         self.config_entry = config_entry
+        # entry data the coordinator runs with, to find what an update changed
+        self.entry_data = dict(config_entry.data)
         self.status_last_reading = {}
         self.printer_online = False
         self.status_error_logged = False
@@ -162,6 +318,21 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
                 config_entry.data[CONF_PORT]
         )
         
+        self.model_api_url = self.base_url + CONF_STANDALONE_API
+        # SBC only: whether DSF answers keyed rr_model queries, otherwise the
+        # full object model is downloaded from the status endpoint
+        self.sbc_keyed_queries = False
+        # partial object model mirror built from the fetched keys
+        self.model = {}
+        # SBC on the same host: object model and G-code through the DSF socket
+        self.dsf = None
+        if not config_entry.data[CONF_STANDALONE] and config_entry.data.get(
+            CONF_DSF_SOCKET
+        ):
+            self.dsf = DsfCommandClient(DSF_SOCKET_PATH)
+            # the subscription pushes every change, nothing to poll
+            self.update_interval = None
+
         if self.config_entry.data[CONF_STANDALONE]:
             self.status_api_url = self.base_url+CONF_STANDALONE_API
             #if standalone and has password
@@ -180,7 +351,66 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
         self.firmware_version = (None,)
         self.board_model = (None,)
         self.status_data = {}
-
+        # SENSOR_TYPES and the user defined object model sensors
+        self.custom_sensors = parse_custom_sensors(
+            config_entry.data.get(CONF_CUSTOM_SENSORS)
+        )
+        self.sensor_types = {
+            **SENSOR_TYPES,
+            **get_custom_sensor_types(self.custom_sensors),
+        }
+        # API, firmware and object model keys the firmware lacks, see discovery
+        self.capabilities = {}
+        self.unsupported_keys = frozenset()
+        self.set_capabilities(config_entry.data.get(CONF_CAPABILITIES) or {})
+        # sensor types keys requested by enabled entities, with a reference count
+        self._requested_sensor_types: dict[str, int] = {}
+        # object model keys of recent queries, with the time they expire
+        self._query_keys: dict[str, float] = {}
+        # fingerprint and decoded payload of the responses behind self.data,
+        # by URL, and those of the running poll until it published its data
+        self._response_fingerprints: dict[str, tuple[bytes, dict]] = {}
+        self._poll_fingerprints: dict[str, tuple[bytes, dict]] = {}
+        # polls, refreshes after commands and query fetches all write the model
+        self._model_lock = asyncio.Lock()
+        self._payload_changed = False
+        self.fingerprint_hits = 0
+        self.fingerprint_misses = 0
+        self.polls = 0
+        self.last_poll_duration = 0.0
+        self.total_poll_duration = 0.0
+        self.file_info = FileInfoCache(hass, config_entry.entry_id)
+        self.current_file_info = None
+        self._file_info_key = None
+        self.file_list = FileListing()
+        self.selected_file = None
+        # statistics and rendered image of the loaded heightmap
+        self.heightmap = None
+        self._heightmap_token = None
+        self.layer_history = LayerHistory()
+        self.toolpath = ToolpathTrace()
+        self.print_history = PrintHistory(hass, config_entry.entry_id)
+        # console replies and messages, oldest first
+        self.messages = deque(maxlen=MESSAGE_BUFFER_SIZE)
+        self._reply_seq = None
+        self._last_message_time = None
+        self.session = async_get_clientsession(hass)
+        self.download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        self.upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+        # top level keys to fetch once the commands of a burst were sent
+        self._refresh_keys = set()
+        self.refresh_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=COMMAND_REFRESH_DELAY,
+            immediate=False,
+            function=self._async_targeted_refresh,
+        )
+        self.request_gate = DuetRequestGate(
+            config_entry.data.get(
+                CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+            )
+        )
 
     def get_tools(self):
         """Get the list of tools that temperature is monitored on."""
@@ -197,41 +427,302 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
                 tools = temps.keys()
         return tools
 
-    async def get_status(self, key=None):
+    @callback
+    def async_register_sensor_types(self, sensor_types) -> CALLBACK_TYPE:
+        """Request the given sensor types keys, return a callback to release them.
+
+        Keys that were not fetched so far are fetched shortly, rather than
+        with the next poll.
+        """
+        new_keys = set()
+        for sensor_type in sensor_types:
+            if sensor_type not in self._requested_sensor_types and (
+                sensor_type in self.sensor_types
+            ):
+                new_keys.add(self.get_fetch_key(sensor_type).split(".")[0])
+            self._requested_sensor_types[sensor_type] = (
+                self._requested_sensor_types.get(sensor_type, 0) + 1
+            )
+        if new_keys and self.data is not None:
+            self.async_request_targeted_refresh(new_keys)
+
+        @callback
+        def remove_sensor_types() -> None:
+            for sensor_type in sensor_types:
+                count = self._requested_sensor_types.get(sensor_type, 0) - 1
+                if count > 0:
+                    self._requested_sensor_types[sensor_type] = count
+                    continue
+                self._requested_sensor_types.pop(sensor_type, None)
+                self.status_data.pop(sensor_type, None)
+
+        return remove_sensor_types
+
+    def set_capabilities(self, capabilities) -> None:
+        """Use a capability map, its unsupported keys are no longer fetched."""
+        self.capabilities = capabilities
+        self.unsupported_keys = frozenset(capabilities.get("unsupported_keys", ()))
+
+    @callback
+    def async_apply_options(self) -> None:
+        """Apply the live options of the config entry and notify the platforms."""
+        data = self.config_entry.data
+        self.bed = data[CONF_BED]
+        self.set_capabilities(data.get(CONF_CAPABILITIES) or {})
+        self.request_gate.set_max_concurrent(
+            data.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS)
+        )
+        if self.dsf is None:
+            self.interval = data[CONF_INTERVAL]
+            self.update_interval = timedelta(seconds=self.interval)
+        async_dispatcher_send(
+            self.hass, SIGNAL_OPTIONS_UPDATED.format(self.config_entry.entry_id)
+        )
+
+    def needs_capability_probe(self):
+        """Return True if there is no capability map for the running firmware."""
+        if not self.capabilities:
+            return True
+        firmware = self.firmware_version
+        if isinstance(firmware, (list, tuple)):
+            firmware = firmware[0] if firmware else None
+        return firmware is not None and firmware != self.capabilities.get("firmware")
+
+    async def async_probe_capabilities(self):
+        """Read the verbose object model and return the capability map."""
+        if self.config_entry.data[CONF_STANDALONE]:
+
+            async def read_key(key):
+                key_data = await self.get_status(key, CONF_SBC_MODEL_FLAGS)
+                return key_data.get("result")
+
+            return build_capabilities(API_STANDALONE, await async_read_model(read_key))
+        model = self.data["status"]
+        if model is None:
+            # keyed queries only fetched the boards so far
+            model = await self.get_status()
+        return build_capabilities(API_SBC, model)
+
+    @callback
+    def async_request_targeted_refresh(self, keys) -> None:
+        """Fetch the given top level object model keys shortly after a command.
+
+        Requests arriving before the refresh ran are merged into it.
+        """
+        if self.dsf is not None:
+            # the subscription pushes the changes anyway
+            return
+        self._refresh_keys.update(keys)
+        self.hass.async_create_task(self.refresh_debouncer.async_call())
+
+    async def _async_targeted_refresh(self):
+        """Fetch the requested keys and publish them with the rest of the model."""
+        keys, self._refresh_keys = self._refresh_keys, set()
+        if not (self.config_entry.data[CONF_STANDALONE] or self.sbc_keyed_queries):
+            # DSF without keyed queries only serves the full object model
+            await self.async_request_refresh()
+            return
+        fetch_plan = {
+            sensor_name: json_path
+            for sensor_name, json_path in self.get_fetch_plan().items()
+            if json_path.split(".")[0] in keys
+        }
+        if not fetch_plan:
+            return
+        async with self._model_lock:
+            try:
+                await self._async_merge_refresh(fetch_plan)
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                OSError,
+                ConfigEntryNotReady,
+                UpdateFailed,
+            ) as err:
+                # the next poll catches up
+                _LOGGER.debug("Refresh after a command failed: %r", err)
+
+    async def _async_merge_refresh(self, fetch_plan):
+        """Fetch the keys of a fetch plan into the model and publish it."""
+        # not fingerprinted, the bodies of the next poll are compared with
+        # those behind the data of the last poll
+        model = await self.fetch_model(fetch_plan, fingerprint=False)
+        # the model no longer matches the bodies of the last poll
+        self._response_fingerprints.clear()
+        layers_key = self.get_fetch_key("Layers")
+        for json_path in get_minimal_keys(fetch_plan.values()):
+            if json_path != layers_key and has_json_key(model, json_path):
+                set_json_value(self.model, json_path, get_json_value(model, json_path))
+        if self.config_entry.data[CONF_STANDALONE]:
+            for sensor_name, json_path in fetch_plan.items():
+                value = get_json_value(self.model, json_path)
+                self.status_data[sensor_name] = "" if value is None else value
+            status = self.status_data
+        else:
+            status = self.model
+        await self._async_model_updated()
+        self.async_set_updated_data(
+            {"status": status, "last_read_time": dt_util.utcnow()}
+        )
+
+    def get_fetch_key(self, sensor_name):
+        """Return the object model key of a sensor types entry."""
+        return self.sensor_types[sensor_name]["json_path"].replace("status.", "", 1)
+
+    def get_fetch_plan(self):
+        """Return the object model keys to fetch, by sensor types key."""
+        fetch_plan = {}
+        for sensor_name, sensor_info in self.sensor_types.items():
+            if sensor_name not in self._requested_sensor_types:
+                continue
+            if "file_info" in sensor_info:
+                sensor_names = FILE_IDENTITY_SENSOR_TYPES
+            else:
+                sensor_names = (sensor_name,)
+            for fetched_name in sensor_names:
+                json_path = self.get_fetch_key(fetched_name)
+                if json_path not in self.unsupported_keys:
+                    fetch_plan[fetched_name] = json_path
+        now = time.monotonic()
+        for key, expires in list(self._query_keys.items()):
+            if expires < now:
+                del self._query_keys[key]
+                self.status_data.pop(f"query {key}", None)
+            elif key not in self.unsupported_keys:
+                fetch_plan[f"query {key}"] = key
+        return fetch_plan
+
+    async def async_fetch_query_keys(self, paths):
+        """Add the keys of queries to the mirror, fetching the missing ones now.
+
+        Standalone boards, keyed SBC queries and DSF subscriptions only mirror
+        the keys in the fetch plan, queried keys stay in it for QUERY_KEY_TTL.
+        """
+        if not (
+            self.config_entry.data[CONF_STANDALONE]
+            or self.sbc_keyed_queries
+            or self.dsf is not None
+        ):
+            return
+        keys = set()
+        for path in paths:
+            key = get_query_key(path)
+            if key is None:
+                raise ValueError(f"{path} does not start with an object model key")
+            keys.add(key)
+        mirrored_keys = get_minimal_keys(self.get_fetch_plan().values())
+        missing_keys = get_minimal_keys(
+            key for key in keys if not is_covered(key, mirrored_keys)
+        )
+        expires = time.monotonic() + QUERY_KEY_TTL
+        for key in keys:
+            self._query_keys[key] = expires
+        if not missing_keys:
+            return
+        async with self._model_lock:
+            if self.dsf is not None:
+                model = await self.dsf.async_get_object_model()
+            else:
+                model = await self.fetch_model(
+                    {f"query {key}": key for key in missing_keys}, fingerprint=False
+                )
+            for key in missing_keys:
+                if has_json_key(model, key):
+                    set_json_value(self.model, key, get_json_value(model, key))
+
+    async def async_request(self, method, url, priority, **kwargs):
+        """Send a request through the request gate and return the response body.
+
+        Requests answered with 503 (the board is out of HTTP sessions) are
+        retried with a backoff, without holding a slot while waiting.
+        """
+        for attempt in range(REQUEST_RETRIES + 1):
+            async with self.request_gate.slot(priority):
+                async with async_timeout.timeout(10):
+                    async with self.session.request(method, url, **kwargs) as response:
+                        if response.status != 503 or attempt == REQUEST_RETRIES:
+                            response.raise_for_status()
+                            return await response.read()
+            self.request_gate.retries += 1
+            await asyncio.sleep(REQUEST_RETRY_BACKOFF * 2**attempt)
+
+    @contextlib.asynccontextmanager
+    async def async_stream(self, method, url, priority, **kwargs):
+        """Hold a transfer slot while a file transfer streams its body.
+
+        Transfers are not retried and only time out when the board stops
+        sending or accepting data.
+        """
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=10, sock_read=TRANSFER_READ_TIMEOUT
+        )
+        async with self.request_gate.transfer_slot(priority):
+            async with self.session.request(
+                method, url, timeout=timeout, **kwargs
+            ) as response:
+                response.raise_for_status()
+                yield response
+
+    async def send_gcode(self, gcode, priority=PRIORITY_GCODE):
+        """Send G-code to the printer and return the reply."""
+        if self.dsf is not None:
+            return await self.dsf.async_send_code(gcode)
+        if self.config_entry.data[CONF_STANDALONE]:
+            body = await self.async_request(
+                "GET",
+                self.base_url + CONF_STANDALONE_GCODE_PATH,
+                priority,
+                params={"gcode": gcode},
+                headers=CONF_TEXT_PLAIN_HEADER,
+                ssl=False,
+            )
+        else:
+            body = await self.async_request(
+                "POST",
+                self.base_url + CONF_SBC_API + CONF_SBC_GCODE_PATH,
+                priority,
+                data=gcode,
+                headers=CONF_TEXT_PLAIN_HEADER,
+                ssl=False,
+            )
+        return body.decode()
+
+    async def get_status(self, key=None, flags=None, fingerprint=True):
         """Send a get request, and return the response as a dict."""
         
         
-        # Only query the API at most every 30 seconds
-        if self.config_entry.data[CONF_STANDALONE]:
-            url = f"{self.status_api_url}?key={key}"
-        else:
+        if key is None:
             url = self.status_api_url
+        elif self.config_entry.data[CONF_STANDALONE] and flags is None:
+            url = f"{self.model_api_url}?key={key}"
+        else:
+            flags = flags or CONF_SBC_MODEL_FLAGS
+            url = f"{self.model_api_url}?key={key}&flags={flags}"
         _LOGGER.debug("URL: %s", url)
 
         # send identification if required
         try:
             if (len(self.config_entry.data[CONF_PASSWORD])>0) :
                 connection_url = f"{self.base_url}{self.identification_path}"
-                async with async_timeout.timeout(10):
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(
-                            connection_url, headers=CONF_JSON_HEADER
-                        ) as response:
-                            response.raise_for_status()
+                await self.async_request(
+                    "GET", connection_url, PRIORITY_STATUS, headers=CONF_JSON_HEADER
+                )
         except:
                 _LOGGER.error("Could not identify user to 3d printer")
 
         try:
-            async with async_timeout.timeout(10):
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, headers=CONF_JSON_HEADER) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-                        self.status_last_reading = data
-                        self.printer_online = True
-                        if self.printer_online:
-                            self.status_error_logged = False
-                        return data
+            body = await self.async_request(
+                "GET",
+                url,
+                PRIORITY_STATUS,
+                headers={**CONF_JSON_HEADER, **CONF_ACCEPT_GZIP_HEADER},
+            )
+            data = self._decode_response(url, body) if fingerprint else json.loads(body)
+            self.status_last_reading = data
+            self.printer_online = True
+            if self.printer_online:
+                self.status_error_logged = False
+            return data
         except aiohttp.ClientConnectorError as conn_exc:
             log_string = "Failed to connect to Duet3D board" + "  Error: %s" % (
                 conn_exc
@@ -247,24 +738,510 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
             self.printer_online = False
             raise UpdateFailed(timeout_exc) from timeout_exc
 
+    def _decode_response(self, url, body):
+        """Decode a JSON response, reusing the last result if the body is unchanged."""
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+        previous = self._response_fingerprints.get(url)
+        if previous is not None and previous[0] == fingerprint:
+            self.fingerprint_hits += 1
+            return previous[1]
+        self.fingerprint_misses += 1
+        self._payload_changed = True
+        data = json.loads(body)
+        self._poll_fingerprints[url] = (fingerprint, data)
+        return data
+
+    async def async_detect_sbc_keyed_queries(self):
+        """Check if DSF answers keyed object model queries, return the boards if so."""
+        try:
+            boards = await self.get_status("boards")
+        except aiohttp.ClientResponseError as err:
+            if err.status >= 500:
+                raise
+            boards = None
+        except ValueError:
+            boards = None
+        if not isinstance(boards, dict) or "result" not in boards:
+            _LOGGER.info(
+                "DSF does not support keyed object model queries, "
+                "falling back to the full %s%s",
+                CONF_SBC_API,
+                CONF_SBC_STATUS_PATH,
+            )
+            return None
+        self.sbc_keyed_queries = True
+        return boards["result"]
+
+    async def fetch_model(self, fetch_plan, fingerprint=True):
+        """Fetch the keys of the fetch plan and return them as a partial model.
+
+        Without fingerprint, the responses are not compared with those of
+        the last poll.
+        """
+        layers_key = self.get_fetch_key("Layers")
+        model = {}
+        json_paths = [
+            json_path for json_path in fetch_plan.values() if json_path != layers_key
+        ]
+        for key in get_minimal_keys(json_paths):
+            key_data = await self.get_status(key, fingerprint=fingerprint)
+            if "result" in key_data:
+                set_json_value(model, key, key_data["result"])
+        if "Layers" in fetch_plan:
+            await self._async_fetch_new_layers(model)
+        return model
+
+    async def _async_fetch_new_layers(self, model):
+        """Fetch only the job.layers entries that are not in the layer history yet."""
+        self.layer_history.check_job(
+            get_json_value(model, self.get_fetch_key("File Name")),
+            get_json_value(model, self.get_fetch_key("Time Elapsed")),
+        )
+        offset = len(self.layer_history)
+        while True:
+            url = "{0}?key={1}&flags={2}".format(
+                self.model_api_url,
+                self.get_fetch_key("Layers"),
+                CONF_ARRAY_RANGE_FLAGS.format(offset),
+            )
+            body = await self.async_request(
+                "GET",
+                url,
+                PRIORITY_STATUS,
+                headers={**CONF_JSON_HEADER, **CONF_ACCEPT_GZIP_HEADER},
+            )
+            # not fingerprinted, every offset is a different URL
+            layers_data = json.loads(body)
+            layers = layers_data.get("result") or []
+            if offset and layers and self.layer_history.holds(0, layers[0]):
+                # the firmware ignored the array offset and sent the full history,
+                # the layer at the offset would be a new one
+                layers = layers[offset:]
+            if layers:
+                self._payload_changed = True
+                self.layer_history.extend(layers)
+            offset = layers_data.get("next") or 0
+            if not offset:
+                return
+
+    def _update_layer_history(self, printer_status):
+        """Append the new layers of a full object model to the layer history."""
+        self.layer_history.check_job(
+            get_json_value(printer_status, self.get_fetch_key("File Name")),
+            get_json_value(printer_status, self.get_fetch_key("Time Elapsed")),
+        )
+        layers = get_json_value(printer_status, self.get_fetch_key("Layers")) or []
+        if len(layers) < len(self.layer_history):
+            self.layer_history.reset()
+        self.layer_history.extend(layers[len(self.layer_history) :])
+
     async def _async_update_data(self):
+        """Update printer data via API, timing the poll."""
+        start = time.monotonic()
+        try:
+            async with self._model_lock:
+                data = await self._async_poll()
+        except BaseException:
+            # bodies of a failed poll may be newer than self.data
+            self._response_fingerprints.clear()
+            raise
+        else:
+            self._response_fingerprints.update(self._poll_fingerprints)
+            return data
+        finally:
+            self._poll_fingerprints.clear()
+            self.polls += 1
+            self.last_poll_duration = time.monotonic() - start
+            self.total_poll_duration += self.last_poll_duration
+
+    async def _async_poll(self):
         """Update printer data via API"""
+        self._payload_changed = False
         if self.config_entry.data[CONF_STANDALONE]:
-            for sensor_name, sensor_info in SENSOR_TYPES.items():
-                json_path = sensor_info["json_path"]
-                json_path = json_path.replace("status.", "")
-                sensor_data = await self.get_status(json_path)
-                if self.status_data is not None and "result" in sensor_data:
-                    self.status_data[sensor_name] = sensor_data["result"]
-                else:
-                    self.status_data[sensor_name] = ""
+            fetch_plan = self.get_fetch_plan()
+            model = await self.fetch_model(fetch_plan)
+            if self._is_unchanged():
+                return self.data
+            self.model = model
+            await self._async_model_updated()
+            for sensor_name, json_path in fetch_plan.items():
+                value = get_json_value(self.model, json_path)
+                self.status_data[sensor_name] = "" if value is None else value
             return {"status": self.status_data, "last_read_time": dt_util.utcnow()}
+        elif self.dsf is not None:
+            # the subscription keeps the data current, this is a manual refresh
+            try:
+                model = await self.dsf.async_get_object_model()
+            except (OSError, asyncio.TimeoutError, DsfError) as err:
+                raise UpdateFailed(f"Error reading the object model: {err}") from err
+            return await self._async_process_full_model(model)
+        elif self.sbc_keyed_queries:
+            model = await self.fetch_model(self.get_fetch_plan())
+            if self._is_unchanged():
+                return self.data
+            self.model = model
+            await self._async_model_updated()
+            return {"status": self.model, "last_read_time": dt_util.utcnow()}
         else:
             printer_status = await self.get_status()
+            if self._is_unchanged():
+                return self.data
             if printer_status is not None:
+                self.model = printer_status
+                if "Layers" in self._requested_sensor_types:
+                    self._update_layer_history(printer_status)
+                await self._async_model_updated()
                 return {"status": printer_status, "last_read_time": dt_util.utcnow()}
 
+    async def async_handle_dsf_model(self, model):
+        """Publish an object model pushed by the DSF subscription."""
+        self.async_set_updated_data(await self._async_process_full_model(model))
+
+    async def _async_process_full_model(self, model):
+        """Process a full object model read from the DSF socket."""
+        self.model = model
+        if "Layers" in self._requested_sensor_types:
+            self._update_layer_history(model)
+        await self._async_model_updated()
+        return {"status": model, "last_read_time": dt_util.utcnow()}
+
+    async def _async_model_updated(self):
+        """Process a changed object model before the listeners are updated."""
+        if any(
+            "file_info" in self.sensor_types[sensor_type]
+            for sensor_type in self._requested_sensor_types
+        ):
+            await self._async_update_file_info()
+        if (
+            "Volumes Sequence" in self._requested_sensor_types
+            or "Volumes" in self._requested_sensor_types
+        ):
+            await self._async_update_file_list()
+        if "Heightmap" in self._requested_sensor_types:
+            await self._async_update_heightmap()
+        if "Reply Sequence" in self._requested_sensor_types:
+            await self._async_collect_reply()
+        if "Messages" in self._requested_sensor_types:
+            self._collect_model_messages()
+        if "Toolpath" in self._requested_sensor_types:
+            self._update_toolpath()
+        if "Last File Cancelled" in self._requested_sensor_types:
+            await self.print_history.async_observe(
+                {
+                    "status": self._get_model_value("Current State"),
+                    "file_name": self._get_model_value("File Name"),
+                    "duration": self._get_model_value("Time Elapsed"),
+                    "filament": self._get_model_value("Filament Extrusion"),
+                    "layer": self._get_model_value("Current Layer"),
+                    "cancelled": self._get_model_value("Last File Cancelled"),
+                    "aborted": self._get_model_value("Last File Aborted"),
+                }
+            )
+
+    def _update_toolpath(self):
+        """Append the XY position to the toolpath trace while a job prints."""
+        self.toolpath.check_job(
+            self._get_model_value("File Name"), self._get_model_value("Time Elapsed")
+        )
+        if self._get_model_value("Current State") != "processing":
+            return
+        axes = {
+            axis.get("letter"): axis
+            for axis in self._get_model_value("Toolpath") or []
+            if isinstance(axis, dict)
+        }
+        x_axis, y_axis = axes.get("X", {}), axes.get("Y", {})
+        limits = (x_axis.get("min"), x_axis.get("max"))
+        limits += (y_axis.get("min"), y_axis.get("max"))
+        if all(isinstance(limit, (int, float)) for limit in limits):
+            self.toolpath.bounds = limits
+        x, y = x_axis.get("machinePosition"), y_axis.get("machinePosition")
+        if x is None or y is None:
+            return
+        self.toolpath.append(x, y, self._get_model_value("Current Layer") or 0)
+
+    def _get_model_value(self, sensor_name):
+        """Return the object model value of a sensor types entry."""
+        return get_json_value(self.model, self.get_fetch_key(sensor_name))
+
+    async def _async_update_file_info(self):
+        """Look up the metadata of the job file when a different file is loaded."""
+        file_name, size, last_modified = (
+            get_json_value(self.model, self.get_fetch_key(identity_type))
+            for identity_type in FILE_IDENTITY_SENSOR_TYPES
+        )
+        if not file_name:
+            self._file_info_key = None
+            self.current_file_info = None
+            return
+        key = FileInfoCache.get_key(file_name, size, last_modified)
+        if key == self._file_info_key:
+            return
+
+        file_info = self.file_info.get(key)
+        standalone = self.config_entry.data[CONF_STANDALONE]
+        thumbnails = "Thumbnail" in self._requested_sensor_types
+        try:
+            if file_info is None or (
+                thumbnails and not standalone and _lacks_thumbnail_data(file_info)
+            ):
+                # DSF only sends the image data of the thumbnails when asked
+                file_info = await self.async_fetch_file_info(file_name, thumbnails)
+                if file_info is None:
+                    return
+            if thumbnails and standalone and _lacks_thumbnail_data(file_info):
+                await self._async_fetch_thumbnails(file_name, file_info)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            _LOGGER.debug("Failed to fetch the file info of %s: %s", file_name, err)
+            return
+        self.file_info.set(key, file_info)
+        self._file_info_key = key
+        self.current_file_info = file_info
+
+    async def async_fetch_file_info(self, file_name, thumbnails=False):
+        """Return the metadata of a G-code file, or None if the board has none.
+
+        With thumbnails, DSF includes the image data of the thumbnails.
+        """
+        if self.config_entry.data[CONF_STANDALONE]:
+            body = await self.async_request(
+                "GET",
+                self.base_url + CONF_STANDALONE_FILEINFO_PATH,
+                PRIORITY_STATUS,
+                params={"name": file_name},
+                headers=CONF_JSON_HEADER,
+            )
+        else:
+            body = await self.async_request(
+                "GET",
+                "{0}{1}{2}/{3}".format(
+                    self.base_url,
+                    CONF_SBC_API,
+                    CONF_SBC_FILEINFO_PATH,
+                    quote(file_name, safe="/:"),
+                ),
+                PRIORITY_THUMBNAIL if thumbnails else PRIORITY_STATUS,
+                params={"readThumbnailContent": "true"} if thumbnails else None,
+                headers=CONF_JSON_HEADER,
+            )
+        file_info = json.loads(body)
+        if file_info.get("err"):
+            _LOGGER.debug("No file info for %s: %s", file_name, file_info)
+            return None
+        file_info["fileName"] = file_name
+        return file_info
+
+    async def _async_fetch_thumbnails(self, file_name, file_info):
+        """Fill in the image data of the thumbnails of a standalone file info."""
+        for thumbnail in file_info["thumbnails"]:
+            if thumbnail.get("data") is not None or thumbnail.get("offset") is None:
+                continue
+            data = []
+            offset = thumbnail["offset"]
+            while offset:
+                body = await self.async_request(
+                    "GET",
+                    self.base_url + CONF_STANDALONE_THUMBNAIL_PATH,
+                    PRIORITY_THUMBNAIL,
+                    params={"name": file_name, "offset": offset},
+                    headers=CONF_JSON_HEADER,
+                )
+                chunk = json.loads(body)
+                if chunk.get("err"):
+                    break
+                data.append(chunk.get("data") or "")
+                offset = chunk.get("next") or 0
+            else:
+                thumbnail["data"] = "".join(data)
+
+    async def _async_update_file_list(self):
+        """Read the G-code file listing again when the volumes changed."""
+        if self.config_entry.data[CONF_STANDALONE]:
+            change_token = get_json_value(
+                self.model, self.get_fetch_key("Volumes Sequence")
+            )
+        else:
+            volumes = get_json_value(self.model, self.get_fetch_key("Volumes"))
+            change_token = (
+                None if volumes is None else json.dumps(volumes, sort_keys=True)
+            )
+        if change_token is None or change_token == self.file_list.change_token:
+            return
+        try:
+            files = await self.async_list_files(GCODES_DIRECTORY)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            _LOGGER.debug("Failed to list %s: %s", GCODES_DIRECTORY, err)
+            return
+        self.file_list.set_files(files, change_token, MAX_FILE_OPTIONS)
+
+    async def async_list_files(self, directory, prefix=""):
+        """Return the files below a directory, with paths relative to it."""
+        files = []
+        for entry in await self._async_list_directory(directory):
+            name = prefix + entry["name"]
+            if entry.get("type") == "d":
+                files.extend(
+                    await self.async_list_files(
+                        f"{directory}/{entry['name']}", name + "/"
+                    )
+                )
+            else:
+                files.append(
+                    {"name": name, "size": entry.get("size"), "date": entry.get("date")}
+                )
+        return files
+
+    async def _async_list_directory(self, directory):
+        """Return the entries of one directory, following rr_filelist's pages."""
+        if not self.config_entry.data[CONF_STANDALONE]:
+            body = await self.async_request(
+                "GET",
+                "{0}{1}{2}/{3}".format(
+                    self.base_url,
+                    CONF_SBC_API,
+                    CONF_SBC_DIRECTORY_PATH,
+                    quote(directory, safe="/:"),
+                ),
+                PRIORITY_STATUS,
+                headers={**CONF_JSON_HEADER, **CONF_ACCEPT_GZIP_HEADER},
+            )
+            return json.loads(body)
+
+        entries = []
+        first = 0
+        while True:
+            body = await self.async_request(
+                "GET",
+                self.base_url + CONF_STANDALONE_FILELIST_PATH,
+                PRIORITY_STATUS,
+                params={"dir": directory, "first": first},
+                headers=CONF_JSON_HEADER,
+            )
+            page = json.loads(body)
+            if page.get("err"):
+                raise ValueError(f"rr_filelist error {page['err']} for {directory}")
+            entries.extend(page.get("files") or [])
+            first = page.get("next") or 0
+            if not first:
+                return entries
+
+    async def _async_update_heightmap(self):
+        """Download and analyze the heightmap when the mesh compensation changed."""
+        compensation = get_json_value(self.model, self.get_fetch_key("Heightmap"))
+        if compensation is None:
+            return
+        heightmap_token = json.dumps(compensation, sort_keys=True)
+        if heightmap_token == self._heightmap_token:
+            return
+        heightmap_file = compensation.get("file")
+        if not heightmap_file:
+            # no mesh loaded
+            self.heightmap = None
+            self._heightmap_token = heightmap_token
+            return
+        if ":" not in heightmap_file:
+            # relative names are in the system directory
+            heightmap_file = f"{SYS_DIRECTORY}/{heightmap_file}"
+        try:
+            body = await self.async_read_file(heightmap_file, PRIORITY_THUMBNAIL)
+            statistics, image = await self.hass.async_add_executor_job(
+                process_heightmap, body.decode()
+            )
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ValueError,
+            IndexError,
+        ) as err:
+            _LOGGER.debug("Failed to process %s: %s", heightmap_file, err)
+            return
+        self.heightmap = {
+            "file": heightmap_file,
+            "statistics": statistics,
+            "image": image,
+        }
+        self._heightmap_token = heightmap_token
+
+    async def async_read_file(self, path, priority):
+        """Return the content of a small file on the printer's storage."""
+        if self.config_entry.data[CONF_STANDALONE]:
+            return await self.async_request(
+                "GET",
+                self.base_url + CONF_STANDALONE_DOWNLOAD_PATH,
+                priority,
+                params={"name": path},
+            )
+        return await self.async_request("GET", get_sbc_file_url(self, path), priority)
+
+    async def _async_collect_reply(self):
+        """Fetch the console reply when the object model reports new output."""
+        reply_seq = get_json_value(self.model, self.get_fetch_key("Reply Sequence"))
+        if reply_seq is None or reply_seq == self._reply_seq:
+            return
+        # the reply buffer already present at startup is not reported
+        if self._reply_seq is not None:
+            try:
+                body = await self.async_request(
+                    "GET", self.base_url + CONF_STANDALONE_REPLY_PATH, PRIORITY_STATUS
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                # fetched again with the next poll
+                _LOGGER.debug("Failed to fetch the console reply: %r", err)
+                return
+            reply = body.decode(errors="replace").strip()
+            if reply:
+                if reply.startswith("Error"):
+                    message_type = MESSAGE_TYPE_ERROR
+                elif reply.startswith("Warning"):
+                    message_type = MESSAGE_TYPE_WARNING
+                else:
+                    message_type = MESSAGE_TYPE_SUCCESS
+                self._add_message(reply, message_type, dt_util.utcnow().isoformat())
+        self._reply_seq = reply_seq
+
+    def _collect_model_messages(self):
+        """Collect the DSF messages of the object model not seen before."""
+        messages = get_json_value(self.model, self.get_fetch_key("Messages"))
+        for message in messages or []:
+            message_time = message.get("time")
+            if self._last_message_time is not None and (
+                message_time is None or message_time <= self._last_message_time
+            ):
+                continue
+            self._last_message_time = message_time
+            self._add_message(
+                message.get("content", ""),
+                MESSAGE_TYPES.get(message.get("type"), MESSAGE_TYPE_SUCCESS),
+                message_time,
+            )
+
+    def _add_message(self, content, message_type, message_time):
+        """Store a console message in the ring buffer and fire it as an event."""
+        message = {"type": message_type, "content": content, "time": message_time}
+        self.messages.append(message)
+        self.hass.bus.async_fire(
+            EVENT_MESSAGE,
+            {
+                "entry_id": self.config_entry.entry_id,
+                "name": self.config_entry.data[CONF_NAME],
+                **message,
+            },
+        )
+
+    def _is_unchanged(self):
+        """Return True if every response of this poll matched the previous one.
+
+        Returning the previous data object unchanged skips the projection and,
+        as the coordinator does not always update, every listener callback.
+        """
+        return not self._payload_changed and self.data["status"] is not None
+
     def get_sensor_state(self, json_path=None, sensor_name=None):
+        file_info_field = self.sensor_types.get(sensor_name, {}).get("file_info")
+        if file_info_field is not None:
+            if self.current_file_info is None:
+                return None
+            return self.current_file_info.get(file_info_field)
         if self.config_entry.data[CONF_STANDALONE]:
             if self.data["status"] is not None and sensor_name in self.data["status"]:
                 return self.data["status"][sensor_name]
@@ -274,21 +1251,7 @@ class DuetDataUpdateCoordinator(DataUpdateCoordinator):
     def get_json_value_by_path(self, json_path):
         if json_path is None:
             raise UpdateFailed()
-        # convert the JSON response to a dictionary object
-        json_data = self.data
-        # split the JSON path on period separator and iterate over the path elements
-        for path_element in json_path.split("."):
-            # if the current path element contains an array index
-            if "[" in path_element:
-                list_name, index_str = path_element[:-1].split("[")
-                # get the value at the specified index in the list
-                json_data = json_data[list_name][int(index_str)]
-            else:
-                # otherwise, access the object property with the current path element
-                if path_element not in json_data:
-                    return None
-                json_data = json_data[path_element]
-        return json_data
+        return get_json_value(self.data, json_path)
 
     @property
     def device_info(self) -> DeviceInfo:
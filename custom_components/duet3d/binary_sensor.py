@@ -36,6 +36,9 @@ class DuetPrintSensorBase(
 ):
     """Representation of an Duet3D sensor."""
 
+    # SENSOR_TYPES keys the entity reads, only these are fetched from the board
+    _sensor_types: tuple[str, ...] = ()
+
     def __init__(
         self,
         coordinator: DuetDataUpdateCoordinator,
@@ -53,10 +56,18 @@ class DuetPrintSensorBase(
         """Device info."""
         return self.coordinator.device_info
 
+    async def async_added_to_hass(self) -> None:
+        """Request the object model keys this entity reads from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types(self._sensor_types)
+        )
+
 
 class DuetPrintingSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Current State",)
     _attr_icon = "mdi:file-percent"
 
     def __init__(
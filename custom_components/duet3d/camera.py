@@ -7,13 +7,13 @@ from . import DuetDataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import logging
 import io
-from PIL import Image
 
 _LOGGER = logging.getLogger(__name__)
 from .const import (
     DOMAIN,
     SENSOR_TYPES,
 )
+from .toolpath import render_toolpath
 
 
 async def async_setup_entry(
@@ -26,7 +26,13 @@ async def async_setup_entry(
     ]
     device_id = config_entry.entry_id
     assert device_id is not None
-    async_add_entities([DuetThumbnailCamera(coordinator, "Thumbnail", device_id)])
+    async_add_entities(
+        [
+            DuetThumbnailCamera(coordinator, "Thumbnail", device_id),
+            DuetHeightmapCamera(coordinator, "Heightmap", device_id),
+            DuetToolpathCamera(coordinator, "Toolpath", device_id),
+        ]
+    )
 
 
 class DuetThumbnailCamera(CoordinatorEntity[DuetDataUpdateCoordinator], Camera):
@@ -57,13 +63,20 @@ class DuetThumbnailCamera(CoordinatorEntity[DuetDataUpdateCoordinator], Camera):
         """Device info."""
         return self.coordinator.device_info
 
+    async def async_added_to_hass(self) -> None:
+        """Request the thumbnail data from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types((self.camera_name,))
+        )
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
         job_thumbnail = self.coordinator.get_sensor_state(
             SENSOR_TYPES[self.camera_name]["json_path"], self.camera_name
         )
-        return len(job_thumbnail) > 0
+        return bool(job_thumbnail) and job_thumbnail[0].get("data") is not None
 
     async def async_camera_image(
         self, width: int | None = None, height: int | None = None
@@ -75,19 +88,153 @@ class DuetThumbnailCamera(CoordinatorEntity[DuetDataUpdateCoordinator], Camera):
         )
         if self.available:
             thumbnail_data = base64.b64decode(thumbnail_info[0]["data"])
-            if b"qoi" in thumbnail_data:
-                thumbnail_data = self.convert_qoi_to_jpeg(thumbnail_data)
-
             if self.last_thumbnail_data == thumbnail_data:
                 return self.last_image
 
-            self.last_image = thumbnail_data
+            self.last_thumbnail_data = thumbnail_data
+            if b"qoi" in thumbnail_data:
+                # Pillow is only imported (off the event loop) when a QOI
+                # thumbnail actually has to be converted
+                self.last_image = await self.hass.async_add_executor_job(
+                    self.convert_qoi_to_jpeg, thumbnail_data
+                )
+            else:
+                self.last_image = thumbnail_data
             return self.last_image
 
     def convert_qoi_to_jpeg(self, qoi_data):
+        from PIL import Image
+
         # Load QOI image from bytes
         qoi_image = Image.open(io.BytesIO(qoi_data)).convert("RGB")
         # Convert QOI image to JPEG format
         with io.BytesIO() as output:
             qoi_image.save(output, format="JPEG")
             return output.getvalue()
+
+
+class DuetHeightmapCamera(CoordinatorEntity[DuetDataUpdateCoordinator], Camera):
+    """A camera to show the colour mapped bed heightmap of a Duet3D printer."""
+
+    _attr_motion_detection_enabled = False
+    _attr_icon = "mdi:grid"
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        camera_name: str,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet heightmap camera."""
+        Camera.__init__(self)
+        CoordinatorEntity.__init__(self, coordinator)
+        self._device_id = device_id
+        self._attr_name = f"{self.device_info['name']} {camera_name}"
+        self._attr_unique_id = f"{camera_name}-{device_id}"
+        self.content_type = "image/png"
+        self.camera_name = camera_name
+
+    @property
+    def device_info(self):
+        """Device info."""
+        return self.coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Request the mesh compensation from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types((self.camera_name,))
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.heightmap is not None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the mesh statistics."""
+        if self.coordinator.heightmap is None:
+            return None
+        return {
+            "file": self.coordinator.heightmap["file"],
+            **self.coordinator.heightmap["statistics"],
+        }
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return the image rendered when the heightmap last changed."""
+        if self.coordinator.heightmap is None:
+            return None
+        return self.coordinator.heightmap["image"]
+
+
+class DuetToolpathCamera(CoordinatorEntity[DuetDataUpdateCoordinator], Camera):
+    """A camera to show the XY trace of the tool during the current job."""
+
+    _attr_motion_detection_enabled = False
+    _attr_icon = "mdi:printer-3d-nozzle"
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        camera_name: str,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet toolpath camera."""
+        Camera.__init__(self)
+        CoordinatorEntity.__init__(self, coordinator)
+        self._device_id = device_id
+        self._attr_name = f"{self.device_info['name']} {camera_name}"
+        self._attr_unique_id = f"{camera_name}-{device_id}"
+        self.content_type = "image/png"
+        self.camera_name = camera_name
+        # last rendered image and the trace version it shows
+        self._image = None
+        self._image_version = None
+
+    @property
+    def device_info(self):
+        """Device info."""
+        return self.coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Request the positions and job progress from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types(
+                (
+                    self.camera_name,
+                    "Current State",
+                    "Current Layer",
+                    "Time Elapsed",
+                    "File Name",
+                )
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return len(self.coordinator.toolpath) > 0
+
+    @property
+    def extra_state_attributes(self):
+        """Return the number of positions in the trace."""
+        return {"positions": len(self.coordinator.toolpath)}
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return the trace, rendered again only if positions were added."""
+        toolpath = self.coordinator.toolpath
+        if not len(toolpath):
+            return None
+        if toolpath.version != self._image_version:
+            version = toolpath.version
+            self._image = await self.hass.async_add_executor_job(
+                render_toolpath, *toolpath.snapshot(), toolpath.bounds
+            )
+            self._image_version = version
+        return self._image
@@ -7,12 +7,14 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SSL, CONF_PASSWORD
 from homeassistant.data_entry_flow import FlowResult
 from typing import Any
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
 from homeassistant.helpers.typing import UNDEFINED
-import aiohttp
 import asyncio
-import async_timeout
+import ipaddress
 from aiohttp.client_exceptions import ClientError
 
+from .custom_sensors import parse_custom_sensors
+from .discovery import DuetAuthError, async_detect_board, async_scan_network
 from .const import (
     CONF_NUMBER_OF_TOOLS,
     CONF_BED,
@@ -26,8 +28,15 @@ from .const import (
     CONF_LIGHT,
     CONF_INTERVAL,
     CONF_STANDALONE,
-    CONF_JSON_HEADER,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    CONF_DSF_SOCKET,
+    CONF_CUSTOM_SENSORS,
     CONF_TEXT_PLAIN_HEADER,
+    CONF_NETWORK,
+    CONF_BOARD,
+    CONF_CAPABILITIES,
+    API_STANDALONE,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,7 +52,8 @@ def _schema_with_defaults(
     number_of_tools=1,
     has_bed=True,
     has_light=False,
-    use_standalone=True,
+    max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS,
+    use_dsf_socket=False,
 ):
     return vol.Schema(
         {
@@ -58,41 +68,90 @@ def _schema_with_defaults(
             ),
             vol.Optional(CONF_BED, default=has_bed): bool,
             vol.Optional(CONF_LIGHT, default=has_light): bool,
-            vol.Optional(CONF_STANDALONE, default=use_standalone): bool,
+            vol.Optional(
+                CONF_MAX_CONCURRENT_REQUESTS, default=max_concurrent_requests
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(CONF_DSF_SOCKET, default=use_dsf_socket): bool,
         },
         extra=vol.ALLOW_EXTRA,
     )
 
 
-async def test_sbc_connection(base_url) -> str:
-    connection_url = f"{base_url}/connect"
-    async with async_timeout.timeout(10):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                connection_url, headers=CONF_JSON_HEADER
-            ) as response:
-                response.raise_for_status()
-                return response.status
-
-
-async def test_standalone_connection(base_url, password) -> str:
-    connection_url = f"{base_url}/rr_connect?password={password}"
-    async with async_timeout.timeout(10):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                connection_url, headers=CONF_JSON_HEADER
-            ) as response:
-                response.raise_for_status()
-                return response.status
-
-
 class Duet3dConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Duet3DPrinter."""
 
     VERSION = 1
     _LOGGER.debug("Entering config flow")
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self.discovered_boards = {}
+        self.manual_defaults = {}
+
     async def async_step_user(self, user_input=None):
+        """Let the user choose between scanning the network and manual setup."""
+        if user_input is not None:
+            return await self.async_step_manual(user_input)
+        return self.async_show_menu(step_id="user", menu_options=["scan", "manual"])
+
+    async def async_step_scan(self, user_input=None):
+        """Scan a subnet for boards."""
+        errors = {}
+        if user_input is not None:
+            try:
+                boards = await async_scan_network(
+                    user_input[CONF_NETWORK], user_input[CONF_PORT]
+                )
+            except ValueError:
+                errors[CONF_NETWORK] = "invalid_network"
+            else:
+                configured = self._async_current_ids()
+                self.discovered_boards = {
+                    board["host"]: board
+                    for board in boards
+                    if board["host"] not in configured
+                }
+                if self.discovered_boards:
+                    return await self.async_step_pick()
+                errors["base"] = "no_devices_found"
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_NETWORK, default="192.168.2.0/24"): str,
+                    vol.Required(CONF_PORT, default=80): cv.port,
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_pick(self, user_input=None):
+        """Let the user pick one of the boards found by the scan."""
+        if user_input is not None:
+            board = self.discovered_boards[user_input[CONF_BOARD]]
+            self.manual_defaults = {"host": board["host"], "port": board["port"]}
+            return await self.async_step_manual()
+
+        boards = {
+            host: "{0} - {1} {2} ({3})".format(
+                host,
+                board["board"] or "Duet3D",
+                board["firmware"] or "",
+                "standalone" if board["standalone"] else "SBC",
+            )
+            for host, board in sorted(
+                self.discovered_boards.items(),
+                key=lambda item: ipaddress.ip_address(item[0]),
+            )
+        }
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({vol.Required(CONF_BOARD): vol.In(boards)}),
+        )
+
+    async def async_step_manual(self, user_input=None):
+        """Set up a printer from its address and mode."""
         errors = {}
         if user_input is not None:
             # Check if host is already configured
@@ -106,17 +165,19 @@ class Duet3dConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
             try:
-                if user_input[CONF_STANDALONE]:
-                    await test_standalone_connection(connection_url, user_input[CONF_PASSWORD])
-                else:
-                    await test_sbc_connection(connection_url)
-            except (ClientError, asyncio.TimeoutError):
+                capabilities = await async_detect_board(
+                    connection_url, user_input[CONF_PASSWORD]
+                )
+            except DuetAuthError:
+                errors[CONF_PASSWORD] = "invalid_auth"
+            except (ClientError, asyncio.TimeoutError, ValueError):
                 errors[CONF_HOST] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors[CONF_HOST] = "unknown"
 
             if not errors:
+                standalone = capabilities["api"] == API_STANDALONE
                 return self.async_create_entry(
                     title=f"{user_input[CONF_NAME]} ({user_input[CONF_HOST]})",
                     data={
@@ -129,7 +190,13 @@ class Duet3dConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_NUMBER_OF_TOOLS: user_input[CONF_NUMBER_OF_TOOLS],
                         CONF_BED: user_input[CONF_BED],
                         CONF_LIGHT: user_input[CONF_LIGHT],
-                        CONF_STANDALONE: user_input[CONF_STANDALONE],
+                        CONF_STANDALONE: standalone,
+                        CONF_MAX_CONCURRENT_REQUESTS: user_input[
+                            CONF_MAX_CONCURRENT_REQUESTS
+                        ],
+                        CONF_DSF_SOCKET: user_input[CONF_DSF_SOCKET]
+                        and not standalone,
+                        CONF_CAPABILITIES: capabilities,
                         CONF_BASE_URL: connection_url,
                         CONF_SBC_STATUS_PATH: CONF_SBC_STATUS_PATH,
                         CONF_SBC_GCODE_PATH: CONF_SBC_GCODE_PATH,
@@ -137,14 +204,14 @@ class Duet3dConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 )
 
         return self.async_show_form(
-            step_id="user",
-            data_schema=_schema_with_defaults(),
+            step_id="manual",
+            data_schema=_schema_with_defaults(**self.manual_defaults),
             errors=errors,
         )
 
     async def async_step_import(self, user_input):
         """Handle import."""
-        return await self.async_step_user(user_input)
+        return await self.async_step_manual(user_input)
 
     @staticmethod
     @callback
@@ -181,11 +248,20 @@ class Duet3dOptionsFlow(config_entries.OptionsFlow):
         config_data = self.config_entry.data
         config_options = self.config_entry.options
         if user_input is not None:
+            try:
+                parse_custom_sensors(user_input.get(CONF_CUSTOM_SENSORS))
+            except ValueError as err:
+                _LOGGER.warning("Invalid custom sensors: %s", err)
+                errors[CONF_CUSTOM_SENSORS] = "invalid_custom_sensors"
+        if user_input is not None and not errors:
             self.new_entry_data = {
                 CONF_INTERVAL: user_input[CONF_INTERVAL],
                 CONF_BED: user_input[CONF_BED],
                 CONF_LIGHT: user_input[CONF_LIGHT],
                 CONF_STANDALONE: user_input[CONF_STANDALONE],
+                CONF_MAX_CONCURRENT_REQUESTS: user_input[CONF_MAX_CONCURRENT_REQUESTS],
+                CONF_DSF_SOCKET: user_input[CONF_DSF_SOCKET],
+                CONF_CUSTOM_SENSORS: user_input.get(CONF_CUSTOM_SENSORS, ""),
             }
             return self.finish_flow()
         options_schema = vol.Schema(
@@ -208,6 +284,20 @@ class Duet3dOptionsFlow(config_entries.OptionsFlow):
                     CONF_STANDALONE,
                     default=config_data.get(CONF_STANDALONE),
                 ): bool,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    default=config_data.get(
+                        CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Optional(
+                    CONF_DSF_SOCKET,
+                    default=config_data.get(CONF_DSF_SOCKET, False),
+                ): bool,
+                vol.Optional(
+                    CONF_CUSTOM_SENSORS,
+                    default=config_data.get(CONF_CUSTOM_SENSORS, ""),
+                ): TextSelector(TextSelectorConfig(multiline=True)),
             }
         )
         return self.async_show_form(
@@ -17,11 +17,106 @@ CONF_SBC_STATUS_PATH = "/status"
 CONF_SBC_GCODE_PATH = "/code"
 CONF_JSON_HEADER = {"CONTENT_TYPE": "CONTENT_TYPE_JSON"}
 CONF_TEXT_PLAIN_HEADER = {"Content-Type": "text/plain"}
+CONF_ACCEPT_GZIP_HEADER = {"Accept-Encoding": "gzip"}
 CONF_STANDALONE_API = "/rr_model"
+CONF_SBC_MODEL_FLAGS = "d99vn"
+# flags of an rr_model array query starting at the given index
+CONF_ARRAY_RANGE_FLAGS = "d99vna{}"
 CONF_STANDALONE_GCODE_PATH = "/rr_gcode"
+CONF_STANDALONE_REPLY_PATH = "/rr_reply"
+CONF_STANDALONE_FILEINFO_PATH = "/rr_fileinfo"
+CONF_STANDALONE_THUMBNAIL_PATH = "/rr_thumbnail"
+CONF_SBC_FILEINFO_PATH = "/fileinfo"
+CONF_SBC_FILE_PATH = "/file"
+CONF_STANDALONE_UPLOAD_PATH = "/rr_upload"
+CONF_STANDALONE_DOWNLOAD_PATH = "/rr_download"
+CONF_STANDALONE_FILELIST_PATH = "/rr_filelist"
+CONF_SBC_DIRECTORY_PATH = "/directory"
+GCODES_DIRECTORY = "0:/gcodes"
+# most recent G-code files offered by the file select
+MAX_FILE_OPTIONS = 100
+SYS_DIRECTORY = "0:/sys"
+ACCELEROMETER_DIRECTORY = "0:/sys/accelerometer"
 CONF_BASE_URL = "base_url"
 SERVICE_SEND_GCODE = "send_code"
+SERVICE_UPLOAD_FILE = "upload_file"
+SERVICE_DOWNLOAD_FILE = "download_file"
+SERVICE_START_PRINT = "start_print"
+SERVICE_ANALYZE_RESONANCE = "analyze_resonance"
+SERVICE_ANALYZE_GCODE = "analyze_gcode"
+SERVICE_BROADCAST_GCODE = "broadcast_code"
+SERVICE_QUERY = "query"
+SERVICE_PRINT_HISTORY = "print_history"
+ATTR_FILE = "file"
+ATTR_CONFIG_ENTRY = "config_entry"
+ATTR_SOURCE = "source"
+ATTR_DESTINATION = "destination"
+ATTR_ACCELEROMETER = "accelerometer"
+ATTR_SAMPLES = "samples"
+ATTR_MODE = "mode"
+ATTR_IMAGE = "image"
+ATTR_TIMEOUT = "timeout"
+ATTR_ALL = "all"
+ATTR_PATH = "path"
+ATTR_MONTH = "month"
+EVENT_MESSAGE = "duet3d_message"
+# sent with the entry id when options were applied without a reload
+SIGNAL_OPTIONS_UPDATED = "duet3d_options_updated_{}"
 CONF_INTERVAL = "update_interval"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_DSF_SOCKET = "dsf_socket"
+CONF_CUSTOM_SENSORS = "custom_sensors"
+CONF_NETWORK = "network"
+CONF_BOARD = "board"
+CONF_CAPABILITIES = "capabilities"
+API_STANDALONE = "standalone"
+API_SBC = "sbc"
+# entry data applied to the running coordinator, others reload the entry
+LIVE_OPTIONS = {
+    CONF_INTERVAL,
+    CONF_BED,
+    CONF_LIGHT,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_CAPABILITIES,
+}
+DSF_SOCKET_PATH = "/run/dsf/dcs.sock"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 2
+
+# Request priorities, lower values are sent to the board first
+PRIORITY_GCODE = 0
+PRIORITY_LIGHT = 1
+PRIORITY_STATUS = 2
+PRIORITY_THUMBNAIL = 3
+PRIORITY_TRANSFER = 4
+REQUEST_RETRIES = 3
+REQUEST_RETRY_BACKOFF = 0.5
+TRANSFER_CHUNK_SIZE = 64 * 1024
+TRANSFER_READ_TIMEOUT = 60
+MAX_CONCURRENT_DOWNLOADS = 1
+MAX_CONCURRENT_UPLOADS = 1
+BROADCAST_CONCURRENCY = 10
+DEFAULT_BROADCAST_TIMEOUT = 10
+# seconds between a command and the refresh of the keys it affects, the
+# commands sent meanwhile are refreshed together
+COMMAND_REFRESH_DELAY = 1.0
+# top level object model keys refreshed after a command
+GCODE_REFRESH_KEYS = ("state", "heat", "move")
+PRINT_REFRESH_KEYS = ("state", "job")
+LIGHT_REFRESH_KEYS = ("state",)
+# seconds the keys of a query stay in the mirror of keyed modes after a query
+QUERY_KEY_TTL = 600
+
+# Console messages kept per printer
+MESSAGE_BUFFER_SIZE = 50
+MESSAGE_TYPE_SUCCESS = "success"
+MESSAGE_TYPE_WARNING = "warning"
+MESSAGE_TYPE_ERROR = "error"
+# DSF message types
+MESSAGE_TYPES = {
+    0: MESSAGE_TYPE_SUCCESS,
+    1: MESSAGE_TYPE_WARNING,
+    2: MESSAGE_TYPE_ERROR,
+}
 
 SENSOR_TYPES = {
     "Bed Temperatures": {
@@ -51,6 +146,7 @@ SENSOR_TYPES = {
     },
     "Progress": {
         "json_path": "status.job.file.filament",
+        "file_info": "filament",
         "unit": "%",
         "icon": "mdi:clock-end",
     },
@@ -61,12 +157,53 @@ SENSOR_TYPES = {
         "unit": "mm,mm,mm",
         "icon": "mdi:axis-x-arrow",
     },
-    "Thumbnail": {"json_path": "status.job.file.thumbnails", "icon": "mdi:picture"},
+    # positions sampled into the toolpath trace while printing
+    "Toolpath": {"json_path": "status.move.axes", "icon": "mdi:printer-3d-nozzle"},
+    "Thumbnail": {
+        "json_path": "status.job.file.thumbnails",
+        "file_info": "thumbnails",
+        "icon": "mdi:picture",
+    },
     "Current Layer": {"json_path": "status.job.layer"},
-    "Total Layers": {"json_path": "status.job.file.numLayers"},
-    "File Name": {"json_path": "status.job.file.fileName"},
+    "Total Layers": {
+        "json_path": "status.job.file.numLayers",
+        "file_info": "numLayers",
+    },
+    "File Name": {"json_path": "status.job.file.fileName", "file_info": "fileName"},
+    "File Size": {"json_path": "status.job.file.size"},
+    "File Last Modified": {"json_path": "status.job.file.lastModified"},
+    # fetched incrementally, only the layers not held yet are requested
+    "Layers": {"json_path": "status.job.layers", "icon": "mdi:layers-outline"},
+    # standalone: rr_reply is only fetched when the reply sequence moves
+    "Reply Sequence": {"json_path": "status.seqs.reply"},
+    # SBC: messages of the DSF object model
+    "Messages": {"json_path": "status.messages", "icon": "mdi:message-text"},
+    # the file listing is only read again when these change
+    "Volumes Sequence": {"json_path": "status.seqs.volumes"},
+    "Volumes": {"json_path": "status.volumes"},
+    # the heightmap is downloaded again when the compensation changes
+    "Heightmap": {"json_path": "status.move.compensation", "icon": "mdi:grid"},
+    # outcome of the last job, read when a job ends for the print history
+    "Last File Cancelled": {"json_path": "status.job.lastFileCancelled"},
+    "Last File Aborted": {"json_path": "status.job.lastFileAborted"},
 }
 
+# keys the print history follows a job with
+HISTORY_SENSOR_TYPES = (
+    "Current State",
+    "File Name",
+    "Time Elapsed",
+    "Filament Extrusion",
+    "Current Layer",
+    "Last File Cancelled",
+    "Last File Aborted",
+)
+
+# Entries with a "file_info" field are read from the file info cache, only the
+# keys identifying the job file are fetched on every poll
+FILE_IDENTITY_SENSOR_TYPES = ("File Name", "File Size", "File Last Modified")
+FILE_INFO_CACHE_SIZE = 20
+
 PRINTER_STATUS = {
     "starting",
     "simulating",
@@ -0,0 +1,55 @@
+"""User defined sensors reading arbitrary object model values."""
+import re
+
+from homeassistant.components.sensor import SensorDeviceClass
+
+# plain object model keys, e.g. `fans[0].actualValue` or `boards[0].vIn.current`
+_PATH = re.compile(r"[A-Za-z_]\w*(\[\d+\])?(\.[A-Za-z_]\w*(\[\d+\])?)*")
+_DEVICE_CLASSES = {device_class.value for device_class in SensorDeviceClass}
+
+
+def parse_custom_sensors(text):
+    """Parse `path, name, unit, device_class` lines, raise ValueError if invalid.
+
+    Only the path is required, empty lines and lines starting with # are
+    skipped.
+    """
+    sensors = []
+    paths = set()
+    for number, line in enumerate((text or "").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) > 4:
+            raise ValueError(f"Line {number} has more than four fields")
+        path, name, unit, device_class = fields + [""] * (4 - len(fields))
+        if not _PATH.fullmatch(path):
+            raise ValueError(f"Line {number}: {path!r} is not an object model path")
+        if path in paths:
+            raise ValueError(f"Line {number}: {path} is defined twice")
+        if device_class and device_class not in _DEVICE_CLASSES:
+            raise ValueError(f"Line {number}: unknown device class {device_class}")
+        paths.add(path)
+        sensors.append(
+            {
+                "path": path,
+                "name": name or path,
+                "unit": unit or None,
+                "device_class": device_class or None,
+            }
+        )
+    return sensors
+
+
+def get_sensor_type(path):
+    """Return the sensor types key of the custom sensor reading path."""
+    return f"Custom {path}"
+
+
+def get_custom_sensor_types(sensors):
+    """Return SENSOR_TYPES style entries for the custom sensors."""
+    return {
+        get_sensor_type(sensor["path"]): {"json_path": "status." + sensor["path"]}
+        for sensor in sensors
+    }
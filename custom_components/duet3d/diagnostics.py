@@ -0,0 +1,43 @@
+"""Diagnostics support for Duet3D."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from . import DuetDataUpdateCoordinator
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+):
+    """Return diagnostics for a config entry."""
+    coordinator: DuetDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+        "coordinator"
+    ]
+    return {
+        "config_entry": async_redact_data(config_entry.data, TO_REDACT),
+        "firmware_version": coordinator.firmware_version,
+        "board_model": coordinator.board_model,
+        "sbc_keyed_queries": coordinator.sbc_keyed_queries,
+        "dsf_socket": coordinator.dsf is not None,
+        "fetch_plan": coordinator.get_fetch_plan(),
+        "fingerprint": {
+            "hits": coordinator.fingerprint_hits,
+            "misses": coordinator.fingerprint_misses,
+        },
+        "messages": list(coordinator.messages),
+        "request_gate": {
+            "max_concurrent": coordinator.request_gate.max_concurrent,
+            "active": coordinator.request_gate.active,
+            "queued": coordinator.request_gate.queued,
+            "transfers": coordinator.request_gate.transfers,
+            "requests": coordinator.request_gate.requests,
+            "retries": coordinator.request_gate.retries,
+            "last_wait": coordinator.request_gate.last_wait,
+            "average_wait": coordinator.request_gate.average_wait,
+            "max_wait": coordinator.request_gate.max_wait,
+        },
+    }
@@ -0,0 +1,236 @@
+"""Find Duet3D boards and probe their API and object model keys."""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import json
+
+import aiohttp
+
+from .const import (
+    API_SBC,
+    API_STANDALONE,
+    CONF_JSON_HEADER,
+    CONF_SBC_API,
+    CONF_SBC_MODEL_FLAGS,
+    CONF_SBC_STATUS_PATH,
+    CONF_STANDALONE_API,
+    SENSOR_TYPES,
+)
+from .model import has_json_key
+
+PROBE_TIMEOUT = 1.5
+DETECT_TIMEOUT = 10
+SCAN_CONCURRENCY = 128
+# a /22, larger networks take too long to scan from a config flow
+MAX_SCAN_HOSTS = 1024
+
+
+class DuetAuthError(Exception):
+    """The board wants a password that is missing or wrong."""
+
+
+def get_scan_hosts(network: str):
+    """Return the host addresses of a network like 192.168.1.0/24."""
+    hosts = list(ipaddress.ip_network(network, strict=False).hosts())
+    if len(hosts) > MAX_SCAN_HOSTS:
+        raise ValueError(f"{network} has more than {MAX_SCAN_HOSTS} hosts")
+    return [str(host) for host in hosts]
+
+
+def get_capability_keys():
+    """Return the object model keys of the built-in sensors."""
+    return sorted(
+        {
+            sensor_info["json_path"].replace("status.", "", 1)
+            for sensor_info in SENSOR_TYPES.values()
+        }
+    )
+
+
+def _get_board(boards):
+    if not isinstance(boards, list):
+        raise ValueError("Not a Duet3D object model")
+    board = boards[0] if boards and isinstance(boards[0], dict) else {}
+    return {"board": board.get("name"), "firmware": board.get("firmwareVersion")}
+
+
+def build_capabilities(api, model):
+    """Return the capability map of a verbose object model.
+
+    Keys are only listed as unsupported if the firmware sent the object
+    that should contain them.
+    """
+    try:
+        board = _get_board(model.get("boards"))
+    except ValueError:
+        board = {"board": None, "firmware": None}
+    return {
+        "api": api,
+        **board,
+        "unsupported_keys": [
+            key for key in get_capability_keys() if not has_json_key(model, key)
+        ],
+    }
+
+
+async def async_read_model(read_key):
+    """Read the top level objects holding the capability keys.
+
+    read_key returns the verbose value of a top level key, or None if the
+    firmware does not know it.
+    """
+    model = {}
+    top_level_keys = {key.split(".")[0] for key in get_capability_keys()}
+    for key in sorted(top_level_keys | {"boards"}):
+        try:
+            value = await read_key(key)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            # a null object counts as unknown rather than unsupported
+            model[key] = None
+            continue
+        if value is not None:
+            model[key] = value
+    return model
+
+
+def _get_json_object(body: bytes):
+    """Return the JSON object in a response body, or None."""
+    try:
+        result = json.loads(body)
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+async def _async_probe_standalone(session, base_url):
+    """Return the boards of a standalone board, None if it wants a password.
+
+    Any web server may answer 401, so that only counts as a board if the
+    body or rr_connect answers like RepRapFirmware.
+    """
+    async with session.get(
+        f"{base_url}{CONF_STANDALONE_API}",
+        params={"key": "boards", "flags": "d99v"},
+        headers=CONF_JSON_HEADER,
+    ) as response:
+        if response.status in (401, 403):
+            if _get_json_object(await response.read()) is not None:
+                return None
+            async with session.get(
+                f"{base_url}/rr_connect",
+                params={"password": ""},
+                headers=CONF_JSON_HEADER,
+            ) as connect_response:
+                reply = _get_json_object(await connect_response.read())
+            if reply is not None and "err" in reply:
+                return None
+            raise ValueError("Not a Duet3D board")
+        response.raise_for_status()
+        result = json.loads(await response.read())
+    boards = result.get("result") if isinstance(result, dict) else None
+    _get_board(boards)
+    return boards
+
+
+async def _async_read_sbc_model(session, base_url):
+    """Return the full object model of DSF."""
+    async with session.get(
+        f"{base_url}{CONF_SBC_API}{CONF_SBC_STATUS_PATH}", headers=CONF_JSON_HEADER
+    ) as response:
+        response.raise_for_status()
+        model = json.loads(await response.read())
+    _get_board(model.get("boards") if isinstance(model, dict) else None)
+    return model
+
+
+async def _async_probe_both(session, base_url):
+    """Probe both APIs at the same time, return (standalone, sbc) results.
+
+    DSF also answers the rr_ requests of standalone boards, so a board
+    answering on /machine is an SBC.
+    """
+    standalone, sbc = await asyncio.gather(
+        _async_probe_standalone(session, base_url),
+        _async_read_sbc_model(session, base_url),
+        return_exceptions=True,
+    )
+    for result in (standalone, sbc):
+        if isinstance(result, BaseException) and not isinstance(
+            result, (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+        ):
+            raise result
+    return standalone, sbc
+
+
+async def async_probe_host(session, host: str, port: int = 80):
+    """Return the board found at host, or None."""
+    standalone, sbc = await _async_probe_both(session, f"http://{host}:{port}")
+    if isinstance(sbc, dict):
+        board = _get_board(sbc["boards"])
+    elif standalone is None:
+        # the board wants rr_connect with its password first
+        board = {"board": None, "firmware": None}
+    elif not isinstance(standalone, BaseException):
+        board = _get_board(standalone)
+    else:
+        return None
+    standalone = not isinstance(sbc, dict)
+    return {"host": host, "port": port, "standalone": standalone, **board}
+
+
+async def async_scan_network(network: str, port: int = 80):
+    """Probe every host of a network with bounded concurrency, return the boards."""
+    hosts = get_scan_hosts(network)
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    # two requests per host, the default connector limit would halve the rate
+    connector = aiohttp.TCPConnector(limit=2 * SCAN_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=PROBE_TIMEOUT)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def probe(host):
+            async with semaphore:
+                return await async_probe_host(session, host, port)
+
+        results = await asyncio.gather(*(probe(host) for host in hosts))
+    return [result for result in results if result is not None]
+
+
+async def async_detect_board(base_url: str, password: str = ""):
+    """Detect the API of the board at base_url and return its capability map.
+
+    Raises DuetAuthError if a standalone board rejects the password and
+    the error of the standalone probe if neither API answered.
+    """
+    timeout = aiohttp.ClientTimeout(total=DETECT_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        standalone, sbc = await _async_probe_both(session, base_url)
+        if isinstance(sbc, dict):
+            return build_capabilities(API_SBC, sbc)
+        if isinstance(standalone, BaseException):
+            raise standalone
+        if standalone is None and not password:
+            raise DuetAuthError("The board requires a password")
+
+        if password:
+            async with session.get(
+                f"{base_url}/rr_connect",
+                params={"password": password},
+                headers=CONF_JSON_HEADER,
+            ) as response:
+                response.raise_for_status()
+                reply = json.loads(await response.read())
+            if reply.get("err"):
+                raise DuetAuthError("The board rejected the password")
+
+        async def read_key(key):
+            async with session.get(
+                f"{base_url}{CONF_STANDALONE_API}",
+                params={"key": key, "flags": CONF_SBC_MODEL_FLAGS},
+                headers=CONF_JSON_HEADER,
+            ) as response:
+                response.raise_for_status()
+                return json.loads(await response.read()).get("result")
+
+        return build_capabilities(API_STANDALONE, await async_read_model(read_key))
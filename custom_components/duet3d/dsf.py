@@ -0,0 +1,183 @@
+"""Client for the IPC socket of the Duet Software Framework.
+
+When Home Assistant runs on the SBC itself, DSF's Unix socket replaces the
+HTTP API for the object model and for G-code. DSF exchanges JSON objects
+back to back on the socket, without a delimiter between them.
+"""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import logging
+
+import async_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 11
+READ_SIZE = 64 * 1024
+COMMAND_TIMEOUT = 10
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+
+class DsfError(Exception):
+    """DSF refused a connection or a command."""
+
+
+def get_filters(json_paths):
+    """Return DSF subscription filters for object model keys like `job.file`."""
+    filters = []
+    for json_path in json_paths:
+        dsf_path = json_path.replace(".", "/")
+        # a value matches its path, the content of an object needs the wildcard
+        filters.extend((dsf_path, dsf_path + "/**"))
+    return filters
+
+
+class DsfConnection:
+    """One connection to the DSF socket, in command or subscribe mode."""
+
+    def __init__(self, socket_path: str) -> None:
+        """Initialize an unconnected connection."""
+        self.socket_path = socket_path
+        self._reader = None
+        self._writer = None
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def async_connect(self, init_message) -> None:
+        """Open the socket and initialize the connection mode."""
+        self._buffer = ""
+        self._utf8.reset()
+        self._reader, self._writer = await asyncio.open_unix_connection(
+            self.socket_path
+        )
+        server_init = await self.async_receive()
+        _LOGGER.debug("Connected to DSF: %s", server_init)
+        await self.async_send({**init_message, "version": PROTOCOL_VERSION})
+        _check_response(await self.async_receive())
+
+    async def async_send(self, message) -> None:
+        """Send one JSON message."""
+        self._writer.write(json.dumps(message).encode())
+        await self._writer.drain()
+
+    async def async_receive(self):
+        """Return the next JSON message."""
+        while True:
+            self._buffer = self._buffer.lstrip()
+            if self._buffer:
+                try:
+                    message, end = self._decoder.raw_decode(self._buffer)
+                except json.JSONDecodeError:
+                    # the rest of the message has not arrived yet
+                    pass
+                else:
+                    self._buffer = self._buffer[end:]
+                    return message
+            data = await self._reader.read(READ_SIZE)
+            if not data:
+                raise ConnectionResetError("DSF closed the connection")
+            self._buffer += self._utf8.decode(data)
+
+    async def async_close(self) -> None:
+        """Close the socket."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+
+
+def _check_response(response):
+    """Raise DsfError for an unsuccessful response, return its result."""
+    if not response.get("success", False):
+        raise DsfError(
+            "{0}: {1}".format(response.get("errorType"), response.get("errorMessage"))
+        )
+    return response.get("result")
+
+
+class DsfCommandClient:
+    """Command mode connection, opened on first use and after errors."""
+
+    def __init__(self, socket_path: str) -> None:
+        """Initialize the client."""
+        self._connection = DsfConnection(socket_path)
+        self._lock = asyncio.Lock()
+
+    async def async_command(self, command, **parameters):
+        """Run one DSF command and return its result."""
+        async with self._lock:
+            try:
+                async with async_timeout.timeout(COMMAND_TIMEOUT):
+                    if not self._connection.connected:
+                        await self._connection.async_connect({"mode": "Command"})
+                    await self._connection.async_send(
+                        {"command": command, **parameters}
+                    )
+                    return _check_response(await self._connection.async_receive())
+            except (OSError, asyncio.TimeoutError, ValueError):
+                # the next command reconnects
+                await self._connection.async_close()
+                raise
+
+    async def async_send_code(self, code: str) -> str:
+        """Run G-code on the SBC channel and return the reply."""
+        return await self.async_command("SimpleCode", code=code, channel="SBC")
+
+    async def async_get_object_model(self):
+        """Return the full object model."""
+        return await self.async_command("GetObjectModel")
+
+    async def async_close(self) -> None:
+        """Close the connection."""
+        async with self._lock:
+            await self._connection.async_close()
+
+
+async def async_subscribe(socket_path, get_json_paths, on_model, on_error):
+    """Receive the object model from a Full mode subscription until cancelled.
+
+    Only the keys returned by get_json_paths are subscribed to, the
+    subscription is renewed when they change. Lost connections are reopened
+    with an increasing delay, on_error is called with each error.
+    """
+    connection = DsfConnection(socket_path)
+    delay = RECONNECT_DELAY
+    try:
+        while True:
+            json_paths = get_json_paths()
+            try:
+                await connection.async_connect(
+                    {
+                        "mode": "Subscribe",
+                        "subscriptionMode": "Full",
+                        "filters": get_filters(json_paths),
+                    }
+                )
+                while get_json_paths() == json_paths:
+                    model = await connection.async_receive()
+                    delay = RECONNECT_DELAY
+                    await on_model(model)
+                    await connection.async_send({"command": "Acknowledge"})
+            except (OSError, ValueError, DsfError) as err:
+                on_error(err)
+                await connection.async_close()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+            # the requested keys changed, subscribe again right away
+            await connection.async_close()
+    finally:
+        await connection.async_close()
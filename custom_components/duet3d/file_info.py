@@ -0,0 +1,52 @@
+"""Persistent cache of the G-code file metadata reported by a Duet3D board."""
+from collections import OrderedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, FILE_INFO_CACHE_SIZE
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+
+class FileInfoCache:
+    """Least recently used file info, keyed by file name, size and modification time."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache of a config entry."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.file_info")
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def get_key(file_name, size, last_modified) -> str:
+        """Return the key identifying one version of a file."""
+        return f"{file_name}|{size}|{last_modified}"
+
+    async def async_load(self) -> None:
+        """Load the cached file info from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._entries = OrderedDict(data["entries"])
+
+    async def async_remove(self) -> None:
+        """Delete the cache from storage, when its config entry is removed."""
+        await self._store.async_remove()
+
+    def get(self, key):
+        """Return the cached file info, or None if the file is unknown."""
+        file_info = self._entries.get(key)
+        if file_info is not None:
+            self._entries.move_to_end(key)
+        return file_info
+
+    def set(self, key, file_info) -> None:
+        """Cache the file info, dropping the least recently used files."""
+        self._entries[key] = file_info
+        self._entries.move_to_end(key)
+        while len(self._entries) > FILE_INFO_CACHE_SIZE:
+            self._entries.popitem(last=False)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self):
+        return {"entries": list(self._entries.items())}
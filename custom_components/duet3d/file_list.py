@@ -0,0 +1,31 @@
+"""Index of the G-code files stored on a Duet3D board."""
+
+
+class FileListing:
+    """G-code files by path relative to the gcodes directory."""
+
+    def __init__(self) -> None:
+        """Initialize an empty listing."""
+        self.files = {}
+        self.names = []
+        # the names of the most recently changed files, sorted by name
+        self.recent = []
+        # volumes change marker the listing was read at
+        self.change_token = None
+
+    def __contains__(self, name) -> bool:
+        """Return True if the file is in the listing."""
+        return name in self.files
+
+    def set_files(self, files, change_token, max_recent) -> None:
+        """Replace the listing with the given file entries.
+
+        max_recent limits the recent names to the files changed last.
+        """
+        self.files = {file["name"]: file for file in files}
+        self.names = sorted(self.files)
+        newest = sorted(
+            self.files.values(), key=lambda file: file.get("date") or "", reverse=True
+        )
+        self.recent = sorted(file["name"] for file in newest[:max_recent])
+        self.change_token = change_token
@@ -0,0 +1,118 @@
+"""Analysis and rendering of the bed heightmap of a Duet3D printer.
+
+NumPy and Pillow are imported inside the functions, which run in the
+executor, so loading the integration does not import them.
+"""
+import io
+
+# header names of version 1 height map files, by their version 2 names
+V1_HEADER_NAMES = {
+    "xmin": "min0",
+    "xmax": "max0",
+    "ymin": "min1",
+    "ymax": "max1",
+    "xspacing": "spacing0",
+    "yspacing": "spacing1",
+    "xnum": "num0",
+    "ynum": "num1",
+}
+
+# colours from the lowest to the highest point, deviation 0 is white
+PALETTE = (
+    (0.0, (49, 54, 149)),
+    (0.25, (116, 173, 209)),
+    (0.5, (255, 255, 255)),
+    (0.75, (244, 109, 67)),
+    (1.0, (165, 0, 38)),
+)
+UNPROBED_COLOR = (128, 128, 128)
+IMAGE_SIZE = 480
+
+
+def parse_heightmap(text):
+    """Return the header and the grid of a heightmap.csv, unprobed points are NaN."""
+    import numpy as np
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    names = [name.strip() for name in lines[1].split(",")]
+    values = [value.strip() for value in lines[2].split(",")]
+    header = {
+        V1_HEADER_NAMES.get(name, name): value for name, value in zip(names, values)
+    }
+
+    cells = np.char.strip(np.array([line.split(",") for line in lines[3:]]))
+    # RepRapFirmware writes a plain 0 for points that were not probed
+    grid = np.where(cells == "0", "nan", cells).astype(float)
+    return header, grid
+
+
+def analyze_heightmap(header, grid):
+    """Return deviation, RMS, extremes and tilt of the probed points."""
+    import numpy as np
+
+    probed = ~np.isnan(grid)
+    z = grid[probed]
+    statistics = {
+        "points": int(grid.size),
+        "probed_points": int(z.size),
+    }
+    if not z.size:
+        return statistics
+
+    mean = float(z.mean())
+    statistics.update(
+        {
+            "min": round(float(z.min()), 3),
+            "max": round(float(z.max()), 3),
+            "range": round(float(z.max() - z.min()), 3),
+            "mean": round(mean, 3),
+            "deviation": round(float(z.std()), 3),
+            "rms": round(float(np.sqrt(np.mean(z**2))), 3),
+        }
+    )
+
+    # least squares plane z = a * x + b * y + c through the probed points
+    rows, columns = np.nonzero(probed)
+    x = float(header["min0"]) + columns * float(header["spacing0"])
+    y = float(header["min1"]) + rows * float(header["spacing1"])
+    if np.ptp(x) > 0 and np.ptp(y) > 0:
+        coefficients = np.column_stack((x, y, np.ones_like(x)))
+        (slope_x, slope_y, _), *_ = np.linalg.lstsq(coefficients, z, rcond=None)
+        # height difference across the probed area
+        statistics["tilt_x"] = round(float(slope_x * np.ptp(x)), 3)
+        statistics["tilt_y"] = round(float(slope_y * np.ptp(y)), 3)
+    return statistics
+
+
+def render_heightmap(grid):
+    """Return a colour mapped PNG of the heightmap, Y pointing up."""
+    import numpy as np
+    from PIL import Image
+
+    probed = ~np.isnan(grid)
+    limit = np.nanmax(np.abs(grid)) if probed.any() else 0.0
+    scaled = np.zeros_like(grid) if not limit else grid / limit
+    position = np.nan_to_num((scaled + 1) / 2, nan=0.5)
+
+    stops = [stop for stop, _ in PALETTE]
+    pixels = np.empty(grid.shape + (3,), dtype=np.uint8)
+    for channel in range(3):
+        pixels[..., channel] = np.interp(
+            position, stops, [color[channel] for _, color in PALETTE]
+        )
+    pixels[~probed] = UNPROBED_COLOR
+
+    image = Image.fromarray(np.flipud(pixels), "RGB")
+    scale = max(1, IMAGE_SIZE // max(grid.shape))
+    image = image.resize(
+        (grid.shape[1] * scale, grid.shape[0] * scale), Image.Resampling.NEAREST
+    )
+    with io.BytesIO() as output:
+        image.save(output, format="PNG")
+        return output.getvalue()
+
+
+def process_heightmap(text):
+    """Parse, analyze and render a heightmap.csv, return statistics and image."""
+    header, grid = parse_heightmap(text)
+    return analyze_heightmap(header, grid), render_heightmap(grid)
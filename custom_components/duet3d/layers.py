@@ -0,0 +1,68 @@
+"""Compact history of the layers printed by the current job."""
+from array import array
+
+
+class LayerHistory:
+    """Per-layer duration, height and filament of the current job."""
+
+    def __init__(self) -> None:
+        """Initialize an empty history."""
+        self.durations = array("d")
+        self.heights = array("d")
+        self.filament = array("d")
+        self.file_name = None
+        self.job_duration = None
+
+    def __len__(self) -> int:
+        """Return the number of layers held."""
+        return len(self.durations)
+
+    def reset(self) -> None:
+        """Forget the layers of the previous job."""
+        del self.durations[:]
+        del self.heights[:]
+        del self.filament[:]
+
+    def check_job(self, file_name, job_duration) -> None:
+        """Reset the history when a different job is running."""
+        if file_name != self.file_name or (
+            job_duration is not None
+            and self.job_duration is not None
+            and job_duration < self.job_duration
+        ):
+            self.reset()
+        self.file_name = file_name
+        self.job_duration = job_duration
+
+    def holds(self, index: int, layer) -> bool:
+        """Return True if the layer at index has the duration and height of layer."""
+        layer = layer or {}
+        return (
+            index < len(self.durations)
+            and self.durations[index] == (layer.get("duration") or 0.0)
+            and self.heights[index] == (layer.get("height") or 0.0)
+        )
+
+    def extend(self, layers) -> None:
+        """Append the job.layers entries that follow the ones already held."""
+        for layer in layers:
+            layer = layer or {}
+            self.durations.append(layer.get("duration") or 0.0)
+            self.heights.append(layer.get("height") or 0.0)
+            self.filament.append(sum(layer.get("filament") or ()))
+
+    def get_statistics(self):
+        """Return the layer timing statistics of the current job."""
+        if not self.durations:
+            return {"layers": 0}
+        total_duration = sum(self.durations)
+        return {
+            "layers": len(self.durations),
+            "last_layer_time": self.durations[-1],
+            "average_layer_time": total_duration / len(self.durations),
+            "min_layer_time": min(self.durations),
+            "max_layer_time": max(self.durations),
+            "total_layer_time": total_duration,
+            "height": self.heights[-1],
+            "filament": sum(self.filament),
+        }
@@ -9,7 +9,8 @@ from homeassistant.components.light import (
     SUPPORT_COLOR,
 )
 import homeassistant.helpers.config_validation as cv
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -17,7 +18,14 @@ import colorsys
 
 from . import DuetDataUpdateCoordinator
 
-from .const import CONF_NAME, ATTR_GCODE, DOMAIN, SERVICE_SEND_GCODE, CONF_LIGHT, CONF_STANDALONE
+from .const import (
+    DOMAIN,
+    CONF_LIGHT,
+    CONF_STANDALONE,
+    PRIORITY_LIGHT,
+    LIGHT_REFRESH_KEYS,
+    SIGNAL_OPTIONS_UPDATED,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,17 +45,31 @@ async def async_setup_entry(
     """Set up the Duet3D light platform."""
     if config_entry.data[CONF_STANDALONE]:
         return
-    lightIncluded = config_entry.data[CONF_LIGHT]
-    if lightIncluded:
-        coordinator: DuetDataUpdateCoordinator = hass.data[DOMAIN][
-            config_entry.entry_id
-        ]["coordinator"]
-        device_id = config_entry.entry_id
-        assert device_id is not None
-        entities: list[LightEntity] = [
-            Duet3DLight(coordinator, "LED", device_id),
-        ]
-        async_add_entities(entities)
+    coordinator: DuetDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]["coordinator"]
+    device_id = config_entry.entry_id
+    assert device_id is not None
+    entities: list[LightEntity] = []
+
+    @callback
+    def async_update_lights() -> None:
+        """Add or remove the LED light to match the light option."""
+        lightIncluded = config_entry.data[CONF_LIGHT]
+        if lightIncluded and not entities:
+            light = Duet3DLight(coordinator, "LED", device_id)
+            entities.append(light)
+            async_add_entities([light])
+        elif not lightIncluded:
+            while entities:
+                hass.async_create_task(entities.pop().async_remove())
+
+    async_update_lights()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(device_id), async_update_lights
+        )
+    )
 
 
 class Duet3DLightBase(CoordinatorEntity[DuetDataUpdateCoordinator], LightEntity):
@@ -133,17 +155,13 @@ class Duet3DLight(Duet3DLightBase):
             self._rgb_color[0], self._rgb_color[1], self._rgb_color[2], self._brightness
         )
 
-        # Call the send_code service to send the M150 GCode to the Duet3D board
+        # Send the M150 GCode to the Duet3D board, behind user G-code
         try:
-            await self.hass.services.async_call(
-                DOMAIN,
-                SERVICE_SEND_GCODE,
-                {
-                    ATTR_GCODE: command,
-                },
-            )
+            await self.coordinator.send_gcode(command, PRIORITY_LIGHT)
         except Exception as e:
-            _LOGGER.error("Error calling send_gcode service: %s", e)
+            _LOGGER.error("Error sending light G-code: %s", e)
+        else:
+            self.coordinator.async_request_targeted_refresh(LIGHT_REFRESH_KEYS)
 
         # Update the light state in Home Assistant
         self.async_schedule_update_ha_state()
@@ -158,17 +176,13 @@ class Duet3DLight(Duet3DLightBase):
         # Build the M150 GCode command to turn the light off
         command = "M150 R0 U0 B0 P0"
 
-        # Call the send_code service to send the M150 GCode to the Duet3D board
+        # Send the M150 GCode to the Duet3D board, behind user G-code
         try:
-            await self.hass.services.async_call(
-                DOMAIN,
-                SERVICE_SEND_GCODE,
-                {
-                    ATTR_GCODE: command,
-                },
-            )
+            await self.coordinator.send_gcode(command, PRIORITY_LIGHT)
         except Exception as e:
-            _LOGGER.error("Error calling send_gcode service: %s", e)
+            _LOGGER.error("Error sending light G-code: %s", e)
+        else:
+            self.coordinator.async_request_targeted_refresh(LIGHT_REFRESH_KEYS)
 
         # Update the light state in Home Assistant
         self.async_schedule_update_ha_state()
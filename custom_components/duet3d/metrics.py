@@ -0,0 +1,156 @@
+"""Prometheus metrics of all Duet3D printers, served by the HTTP server of HA.
+
+The metrics are rendered from the data the coordinators already hold, a
+scrape never sends a request to a printer.
+"""
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .model import get_json_value
+
+METRICS_URL = "/api/duet3d/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name: (type, help)
+METRICS = {
+    "duet3d_up": ("gauge", "1 if the last update of the printer succeeded."),
+    "duet3d_state": ("gauge", "1 for the current state of the printer."),
+    "duet3d_heater_temperature_celsius": ("gauge", "Heater temperatures."),
+    "duet3d_fan_ratio": ("gauge", "Fan speeds from 0 to 1."),
+    "duet3d_job_layer": ("gauge", "Current layer of the print job."),
+    "duet3d_job_duration_seconds": ("gauge", "Time the print job has been running."),
+    "duet3d_job_time_left_seconds": ("gauge", "Time left by the file progress."),
+    "duet3d_job_progress_ratio": ("gauge", "Print progress by extruded filament."),
+    "duet3d_polls_total": ("counter", "Updates of the printer data."),
+    "duet3d_poll_duration_seconds_total": ("counter", "Time spent in updates."),
+    "duet3d_last_poll_duration_seconds": ("gauge", "Duration of the last update."),
+    "duet3d_requests_total": ("counter", "HTTP requests sent to the printer."),
+    "duet3d_request_retries_total": ("counter", "Requests retried after a 503."),
+    "duet3d_request_wait_seconds_total": (
+        "counter",
+        "Time requests waited for a free slot.",
+    ),
+    "duet3d_request_duration_seconds_total": (
+        "counter",
+        "Time requests held their slot.",
+    ),
+    "duet3d_requests_queued": ("gauge", "Requests waiting for a free slot."),
+    "duet3d_fingerprint_hits_total": ("counter", "Responses identical to the last."),
+    "duet3d_fingerprint_misses_total": ("counter", "Responses that changed."),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _collect_samples(coordinator, add_sample) -> None:
+    """Add the samples of one printer."""
+    labels = {
+        "printer": coordinator.config_entry.title,
+        "entry_id": coordinator.config_entry.entry_id,
+    }
+    add_sample("duet3d_up", labels, int(coordinator.last_update_success))
+
+    gate = coordinator.request_gate
+    add_sample("duet3d_polls_total", labels, coordinator.polls)
+    add_sample(
+        "duet3d_poll_duration_seconds_total", labels, coordinator.total_poll_duration
+    )
+    add_sample(
+        "duet3d_last_poll_duration_seconds", labels, coordinator.last_poll_duration
+    )
+    add_sample("duet3d_requests_total", labels, gate.requests)
+    add_sample("duet3d_request_retries_total", labels, gate.retries)
+    add_sample("duet3d_request_wait_seconds_total", labels, gate.total_wait)
+    add_sample("duet3d_request_duration_seconds_total", labels, gate.total_held)
+    add_sample("duet3d_requests_queued", labels, gate.queued)
+    add_sample("duet3d_fingerprint_hits_total", labels, coordinator.fingerprint_hits)
+    add_sample(
+        "duet3d_fingerprint_misses_total", labels, coordinator.fingerprint_misses
+    )
+
+    model = coordinator.model
+    state = get_json_value(model, "state.status")
+    if state is not None:
+        add_sample("duet3d_state", {**labels, "state": state}, 1)
+    for number, heater in enumerate(get_json_value(model, "heat.heaters") or []):
+        if not isinstance(heater, dict):
+            continue
+        for kind in ("current", "active", "standby"):
+            if _is_number(heater.get(kind)):
+                add_sample(
+                    "duet3d_heater_temperature_celsius",
+                    {**labels, "heater": number, "kind": kind},
+                    heater[kind],
+                )
+    for number, fan in enumerate(get_json_value(model, "fans") or []):
+        if isinstance(fan, dict) and _is_number(fan.get("actualValue")):
+            fan_labels = {**labels, "fan": number}
+            add_sample("duet3d_fan_ratio", fan_labels, fan["actualValue"])
+
+    for name, json_path in (
+        ("duet3d_job_layer", "job.layer"),
+        ("duet3d_job_duration_seconds", "job.duration"),
+        ("duet3d_job_time_left_seconds", "job.timesLeft.file"),
+    ):
+        value = get_json_value(model, json_path)
+        if _is_number(value):
+            add_sample(name, labels, value)
+    filament = (coordinator.current_file_info or {}).get("filament") or []
+    extruded = get_json_value(model, "job.rawExtrusion")
+    if filament and _is_number(filament[0]) and filament[0] and _is_number(extruded):
+        add_sample("duet3d_job_progress_ratio", labels, extruded / filament[0])
+
+
+def render_metrics(coordinators) -> str:
+    """Return the metrics of the coordinators in the Prometheus text format."""
+    samples = {name: [] for name in METRICS}
+
+    def add_sample(name, labels, value):
+        samples[name].append(f"{name}{{{_format_labels(labels)}}} {float(value)!r}")
+
+    for coordinator in coordinators:
+        _collect_samples(coordinator, add_sample)
+
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        if not samples[name]:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
+
+
+class DuetMetricsView(HomeAssistantView):
+    """Serve the metrics of all configured printers."""
+
+    url = METRICS_URL
+    name = "api:duet3d:metrics"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics, without contacting the printers."""
+        coordinators = [
+            printer["coordinator"]
+            for printer in self.hass.data.get(DOMAIN, {}).values()
+        ]
+        return web.Response(
+            body=render_metrics(coordinators).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
@@ -0,0 +1,97 @@
+"""Helpers to work with (partial) copies of the Duet3D object model."""
+import re
+
+_INDEXED_ELEMENT = re.compile(r"^(?P<name>[^\[]+)\[(?P<index>\d+)\]$")
+
+
+def _split_element(path_element):
+    """Split `name[index]` into its name and index, index is None if absent."""
+    match = _INDEXED_ELEMENT.match(path_element)
+    if match is None:
+        return path_element, None
+    return match.group("name"), int(match.group("index"))
+
+
+def _is_prefix(prefix, json_path):
+    """Return True if json_path lies inside the subtree addressed by prefix."""
+    return json_path == prefix or json_path.startswith((prefix + ".", prefix + "["))
+
+
+def get_minimal_keys(json_paths):
+    """Return the object model keys to request so every json_path is covered.
+
+    Keys contained in another requested key are dropped, e.g. `heat.heaters[0]`
+    is served by a request for `heat.heaters`.
+    """
+    keys = []
+    for json_path in sorted(set(json_paths), key=len):
+        if not any(_is_prefix(key, json_path) for key in keys):
+            keys.append(json_path)
+    return keys
+
+
+def is_covered(json_path, keys):
+    """Return True if one of keys contains json_path."""
+    return any(_is_prefix(key, json_path) for key in keys)
+
+
+def get_json_value(json_data, json_path):
+    """Return the value at json_path, or None if it is not in json_data."""
+    for path_element in json_path.split("."):
+        name, index = _split_element(path_element)
+        if not isinstance(json_data, dict) or name not in json_data:
+            return None
+        json_data = json_data[name]
+        if index is not None:
+            if not isinstance(json_data, list) or index >= len(json_data):
+                return None
+            json_data = json_data[index]
+    return json_data
+
+
+def set_json_value(json_data, json_path, value):
+    """Store value at json_path, creating the intermediate objects and arrays."""
+    path_elements = json_path.split(".")
+    for position, path_element in enumerate(path_elements):
+        last = position == len(path_elements) - 1
+        name, index = _split_element(path_element)
+        if index is None:
+            if last:
+                json_data[name] = value
+                return
+            if not isinstance(json_data.get(name), dict):
+                json_data[name] = {}
+            json_data = json_data[name]
+            continue
+
+        if not isinstance(json_data.get(name), list):
+            json_data[name] = []
+        array = json_data[name]
+        if len(array) <= index:
+            array.extend([None] * (index + 1 - len(array)))
+        if last:
+            array[index] = value
+            return
+        if not isinstance(array[index], dict):
+            array[index] = {}
+        json_data = array[index]
+
+
+def has_json_key(json_data, json_path):
+    """Return False if an object along json_path lacks the next key.
+
+    Only missing keys count, a path running into a null value, a scalar or
+    an array index past the end may still exist and returns True.
+    """
+    for path_element in json_path.split("."):
+        name, index = _split_element(path_element)
+        if not isinstance(json_data, dict):
+            return True
+        if name not in json_data:
+            return False
+        json_data = json_data[name]
+        if index is not None:
+            if not isinstance(json_data, list) or index >= len(json_data):
+                return True
+            json_data = json_data[index]
+    return True
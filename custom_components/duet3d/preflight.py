@@ -0,0 +1,118 @@
+"""Local pre-flight analysis of G-code files, before they reach the printer.
+
+The parser runs in a process pool, so parsing large files neither blocks the
+event loop nor holds the GIL of Home Assistant. The results use the field
+names of the board's file info.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import sys
+from collections import OrderedDict
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import FILE_INFO_CACHE_SIZE
+
+POOL_WORKERS = 2
+# the workers find the parser on their path under the name it is loaded with
+WORKER_DIRECTORY = os.path.join(os.path.dirname(__file__), "worker")
+PARSER_MODULE = "duet3d_gcode_parser"
+
+
+def load_parser():
+    """Return the parser module, loaded from its file under its top level name."""
+    module = sys.modules.get(PARSER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            PARSER_MODULE, os.path.join(WORKER_DIRECTORY, f"{PARSER_MODULE}.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[PARSER_MODULE] = module
+    return module
+
+
+class GcodeAnalyzer:
+    """Analyzes local G-code files in a process pool, caching the results."""
+
+    def __init__(self, hass) -> None:
+        """Initialize the analyzer, the pool is started by the first analysis."""
+        self.hass = hass
+        self._cache = OrderedDict()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # imported here, as starting Home Assistant does not need them
+            import multiprocessing
+            import site
+            from concurrent.futures import ProcessPoolExecutor
+
+            load_parser()
+            # spawned workers start from a fresh interpreter instead of a copy
+            # of Home Assistant, and only import the parser module
+            self._pool = ProcessPoolExecutor(
+                POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=site.addsitedir,
+                initargs=(WORKER_DIRECTORY,),
+            )
+        return self._pool
+
+    async def _async_parse(self, path: str):
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self._get_pool()
+        try:
+            return await asyncio.wrap_future(
+                pool.submit(load_parser().parse_gcode_file, path)
+            )
+        except BrokenProcessPool as err:
+            # a crashed worker breaks the pool, the next analysis starts another
+            if self._pool is pool:
+                self._pool = None
+            pool.shutdown(wait=False)
+            raise HomeAssistantError(f"Cannot analyze {path}: {err}") from err
+
+    async def async_analyze(self, path: str):
+        """Return the file info of a local G-code file and the parse throughput."""
+        if not self.hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Access to {path} is not allowed")
+        try:
+            file_stat = await self.hass.async_add_executor_job(os.stat, path)
+        except OSError as err:
+            raise HomeAssistantError(f"Cannot read {path}: {err}") from err
+
+        key = (path, file_stat.st_size, file_stat.st_mtime_ns)
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            return {**result, "cached": True}
+
+        try:
+            file_info, content_hash, duration = await self._async_parse(path)
+        except OSError as err:
+            raise HomeAssistantError(f"Cannot read {path}: {err}") from err
+        result = {
+            **file_info,
+            "size": file_stat.st_size,
+            "hash": content_hash,
+            "duration": round(duration, 3),
+            "throughput": round(file_stat.st_size / duration / 1e6, 1)
+            if duration
+            else None,
+            "fileName": os.path.basename(path),
+        }
+        self._cache[key] = result
+        while len(self._cache) > FILE_INFO_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return {**result, "cached": False}
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,150 @@
+"""Append-only history of the print jobs of a Duet3D printer.
+
+Every finished job is appended as one JSON line. The aggregates are updated
+with each job, the file is only read once when Home Assistant starts.
+"""
+import json
+import logging
+import os
+from collections import deque
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# states of a printer while it works on a job, simulations are not recorded
+JOB_STATES = {
+    "processing",
+    "pausing",
+    "paused",
+    "resuming",
+    "changingTool",
+    "cancelling",
+}
+OUTCOME_COMPLETED = "completed"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_FAILED = "failed"
+RECENT_JOBS = 20
+
+
+def _empty_totals():
+    return {"jobs": 0, "completed": 0, "duration": 0.0, "filament": 0.0}
+
+
+class PrintHistory:
+    """Finished jobs of one printer and their running totals."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the history of a config entry."""
+        self.hass = hass
+        self.path = hass.config.path(".storage", f"{DOMAIN}.{entry_id}.history.jsonl")
+        self.totals = _empty_totals()
+        # totals per month of the job end, e.g. "2024-05"
+        self.months = {}
+        self.recent = deque(maxlen=RECENT_JOBS)
+        self._job = None
+
+    async def async_load(self) -> None:
+        """Read the history file and build the totals."""
+        for record in await self.hass.async_add_executor_job(self._read):
+            self._add_to_totals(record)
+
+    def _read(self):
+        records = []
+        try:
+            with open(self.path, encoding="utf-8") as history_file:
+                for line in history_file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # a line cut short by a crash
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    async def async_remove(self) -> None:
+        """Delete the history file, when its config entry is removed."""
+        await self.hass.async_add_executor_job(self._remove)
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record) -> None:
+        with open(self.path, "a", encoding="utf-8") as history_file:
+            history_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _add_to_totals(self, record) -> None:
+        month = record["ended"][:7]
+        for totals in (self.totals, self.months.setdefault(month, _empty_totals())):
+            totals["jobs"] += 1
+            totals["completed"] += record["outcome"] == OUTCOME_COMPLETED
+            totals["duration"] += record["duration"] or 0.0
+            totals["filament"] += record["filament"] or 0.0
+        self.recent.append(record)
+
+    async def async_observe(self, model_values) -> None:
+        """Track the job in the latest object model values, record it when it ends.
+
+        model_values holds status, file_name, duration, filament, layer,
+        cancelled and aborted of the object model.
+        """
+        status = model_values["status"]
+        if status in JOB_STATES:
+            if self._job is None:
+                # also reached when Home Assistant starts during a print
+                self._job = {
+                    "started": dt_util.utcnow().timestamp()
+                    - (model_values["duration"] or 0)
+                }
+            for key in ("file_name", "duration", "filament", "layer"):
+                if model_values[key] not in (None, ""):
+                    self._job[key] = model_values[key]
+            return
+        if self._job is None or status in (None, ""):
+            return
+
+        job, self._job = self._job, None
+        if model_values["cancelled"]:
+            outcome = OUTCOME_CANCELLED
+        elif model_values["aborted"]:
+            outcome = OUTCOME_FAILED
+        else:
+            outcome = OUTCOME_COMPLETED
+        record = {
+            "file": job.get("file_name"),
+            "started": dt_util.as_local(
+                dt_util.utc_from_timestamp(job["started"])
+            ).isoformat(timespec="seconds"),
+            "ended": dt_util.now().isoformat(timespec="seconds"),
+            "duration": job.get("duration"),
+            "filament": round(job["filament"], 1) if "filament" in job else None,
+            "layers": job.get("layer"),
+            "outcome": outcome,
+        }
+        try:
+            await self.hass.async_add_executor_job(self._append, record)
+        except OSError as err:
+            # the totals still count the job until Home Assistant restarts
+            _LOGGER.error("Failed to record the job in %s: %s", self.path, err)
+        self._add_to_totals(record)
+
+    def get_statistics(self, month=None):
+        """Return the totals of all jobs, or of the jobs ended in a month."""
+        totals = self.totals if month is None else self.months.get(month)
+        totals = totals or _empty_totals()
+        return {
+            "jobs": totals["jobs"],
+            "completed": totals["completed"],
+            "success_rate": round(totals["completed"] / totals["jobs"], 3)
+            if totals["jobs"]
+            else None,
+            "hours": round(totals["duration"] / 3600, 2),
+            "filament": round(totals["filament"], 1),
+        }
@@ -0,0 +1,97 @@
+"""Path queries against the object model mirror of a Duet3D printer.
+
+A query is a dotted object model path like `heat.heaters[1].current`. A
+`*` selects every member of an object or array, `[start:stop:step]` a slice
+of an array and negative indices count from the end. Queries containing a
+wildcard or a slice return the list of all matches.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+_TOKEN = re.compile(r"(?:^|\.)(?P<name>[^.\[\]]+)|\[(?P<index>[^\[\]]*)\]")
+_INDEX = re.compile(r"-?\d+")
+_SLICE = re.compile(r"(-?\d*):(-?\d*)(?::(-?\d*))?")
+
+KEY = "key"
+INDEX = "index"
+SLICE = "slice"
+WILDCARD = "wildcard"
+
+
+def _slice_bound(text):
+    return int(text) if text else None
+
+
+@lru_cache(maxsize=256)
+def compile_query(path: str):
+    """Return the steps of a query and whether it can match several values."""
+    steps = []
+    position = 0
+    while position < len(path):
+        match = _TOKEN.match(path, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Invalid query {path!r} at position {position}")
+        position = match.end()
+        name, index = match.group("name", "index")
+        if name is not None:
+            steps.append((WILDCARD, None) if name == "*" else (KEY, name))
+        elif index == "*":
+            steps.append((WILDCARD, None))
+        elif _INDEX.fullmatch(index):
+            steps.append((INDEX, int(index)))
+        elif match := _SLICE.fullmatch(index):
+            if _slice_bound(match[3]) == 0:
+                raise ValueError(f"Invalid slice step in query {path!r}")
+            bounds = (_slice_bound(bound) for bound in match.groups())
+            steps.append((SLICE, slice(*bounds)))
+        else:
+            raise ValueError(f"Invalid array index {index!r} in query {path!r}")
+    if not steps:
+        raise ValueError("Empty query")
+    multiple = any(kind in (WILDCARD, SLICE) for kind, _ in steps)
+    return tuple(steps), multiple
+
+
+def get_query_key(path: str):
+    """Return the object model key holding all matches of a query.
+
+    That is its leading member names, None if it starts with a wildcard or an
+    array index.
+    """
+    steps, _ = compile_query(path)
+    names = []
+    for kind, argument in steps:
+        if kind != KEY:
+            break
+        names.append(argument)
+    return ".".join(names) or None
+
+
+def evaluate_query(path: str, model):
+    """Return the value of a query in the model, None or [] if nothing matched."""
+    steps, multiple = compile_query(path)
+    values = [model]
+    for kind, argument in steps:
+        matches = []
+        for value in values:
+            if kind == KEY:
+                if isinstance(value, dict) and argument in value:
+                    matches.append(value[argument])
+            elif kind == WILDCARD:
+                if isinstance(value, dict):
+                    matches.extend(value.values())
+                elif isinstance(value, list):
+                    matches.extend(value)
+            elif isinstance(value, list):
+                if kind == SLICE:
+                    matches.extend(value[argument])
+                elif -len(value) <= argument < len(value):
+                    matches.append(value[argument])
+        values = matches
+        if not values:
+            break
+    if multiple:
+        return values
+    return values[0] if values else None
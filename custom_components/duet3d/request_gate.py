@@ -0,0 +1,144 @@
+"""Priority aware limiter for the HTTP sessions of a Duet3D board."""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+
+
+class DuetRequestGate:
+    """Limit the concurrent requests to a board, serving lower priority values first."""
+
+    def __init__(self, max_concurrent: int) -> None:
+        """Initialize the gate with the number of requests the board may serve."""
+        self.max_concurrent = max_concurrent
+        self._active = 0
+        # heap of (priority, sequence, future) of the requests waiting for a slot
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._transfers = 0
+        # futures of the transfers waiting for the transfer limit
+        self._transfer_waiters = []
+        self.requests = 0
+        self.retries = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+        # seconds the slots were held, the time spent in requests
+        self.total_held = 0.0
+
+    @property
+    def active(self) -> int:
+        """Return the number of requests holding a slot."""
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    @property
+    def transfers(self) -> int:
+        """Return the number of file transfers holding or waiting for a slot."""
+        return self._transfers
+
+    @property
+    def max_transfers(self) -> int:
+        """Return the number of slots transfers may hold, one is kept for others."""
+        return max(1, self.max_concurrent - 1)
+
+    @property
+    def average_wait(self) -> float:
+        """Return the average time in seconds a request waited for its slot."""
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        """Change the number of slots, waking waiters if slots were added."""
+        self.max_concurrent = max_concurrent
+        while self._active < self.max_concurrent and self._wake_next():
+            self._active += 1
+        self._wake_transfers()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int):
+        """Hold one of the board's request slots for the duration of the block."""
+        await self._acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.total_held += time.monotonic() - start
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def transfer_slot(self, priority: int):
+        """Hold a slot for a file transfer, leaving one for the other requests.
+
+        A board limited to a single request cannot keep a slot free, there a
+        transfer still delays the other requests.
+        """
+        await self._acquire_transfer()
+        try:
+            async with self.slot(priority):
+                yield
+        finally:
+            self._transfers -= 1
+            self._wake_transfers()
+
+    async def _acquire_transfer(self) -> None:
+        while self._transfers >= self.max_transfers:
+            future = asyncio.get_running_loop().create_future()
+            self._transfer_waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future in self._transfer_waiters:
+                    self._transfer_waiters.remove(future)
+                raise
+        self._transfers += 1
+
+    def _wake_transfers(self) -> None:
+        """Wake the waiting transfers to check the transfer limit again."""
+        waiters, self._transfer_waiters = self._transfer_waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def _acquire(self, priority: int) -> None:
+        start = time.monotonic()
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._sequence), future)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    if entry in self._waiters:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                else:
+                    # the slot was handed over just before the cancellation
+                    self._release()
+                raise
+
+        wait = time.monotonic() - start
+        self.requests += 1
+        self.last_wait = wait
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def _release(self) -> None:
+        if self._active > self.max_concurrent or not self._wake_next():
+            self._active -= 1
+
+    def _wake_next(self) -> bool:
+        """Hand a slot to the most important waiter, return False if none waits."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return True
+        return False
@@ -0,0 +1,235 @@
+"""Accelerometer capture and resonance analysis for Duet3D printers.
+
+NumPy and Pillow are imported inside the analysis functions, which run in
+the executor, so loading the integration does not import them.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+
+import aiohttp
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    ACCELEROMETER_DIRECTORY,
+    CONF_STANDALONE,
+    CONF_STANDALONE_DOWNLOAD_PATH,
+    PRIORITY_GCODE,
+    PRIORITY_TRANSFER,
+    TRANSFER_CHUNK_SIZE,
+)
+from .transfer import get_sbc_file_url
+
+CAPTURE_TIMEOUT = 120
+CAPTURE_POLL_INTERVAL = 1
+DOWNLOAD_RETRIES = 3
+SEGMENT_SIZE = 1024
+MIN_FREQUENCY = 5.0
+PEAK_COUNT = 3
+AXIS_COLORS = {"X": (220, 50, 47), "Y": (38, 139, 210), "Z": (133, 153, 0)}
+IMAGE_WIDTH = 800
+IMAGE_HEIGHT = 400
+# decades of power shown below the highest peak
+DYNAMIC_RANGE = 6
+
+
+async def async_capture_accelerometer(
+    coordinator, accelerometer: str, samples: int, mode: int
+) -> str:
+    """Run M956 and return the path of the CSV file it wrote.
+
+    The file is listed while the board still writes it, so this waits until
+    its size stayed the same for one poll.
+    """
+    known_files = set(await _async_list_captures(coordinator))
+    await coordinator.send_gcode(
+        f"M956 P{accelerometer} S{samples} A{mode}", PRIORITY_GCODE
+    )
+    deadline = time.monotonic() + CAPTURE_TIMEOUT
+    name = size = None
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CAPTURE_POLL_INTERVAL)
+        files = await _async_list_captures(coordinator)
+        if name is None:
+            new_files = set(files) - known_files
+            if new_files:
+                name = max(new_files)
+                size = files[name]
+            continue
+        if files.get(name) is not None and files[name] == size:
+            return f"{ACCELEROMETER_DIRECTORY}/{name}"
+        size = files.get(name)
+    raise HomeAssistantError("The accelerometer capture did not produce a file")
+
+
+async def _async_list_captures(coordinator):
+    """Return the sizes of the files in the accelerometer directory, by name."""
+    try:
+        files = await coordinator.async_list_files(ACCELEROMETER_DIRECTORY)
+    except (aiohttp.ClientResponseError, ValueError):
+        # the directory is created by the first capture
+        return {}
+    return {file["name"]: file["size"] for file in files}
+
+
+async def async_download_accelerometer_csv(coordinator, path: str) -> bytes:
+    """Return the content of an accelerometer CSV, once it has its rate line.
+
+    Parsing is left to process_resonance, which runs in the executor.
+    """
+    if coordinator.config_entry.data[CONF_STANDALONE]:
+        url = coordinator.base_url + CONF_STANDALONE_DOWNLOAD_PATH
+        params = {"name": path}
+    else:
+        url = get_sbc_file_url(coordinator, path)
+        params = None
+
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        data = bytearray()
+        async with coordinator.async_stream(
+            "GET", url, PRIORITY_TRANSFER, params=params
+        ) as response:
+            async for chunk in response.content.iter_chunked(TRANSFER_CHUNK_SIZE):
+                data += chunk
+        if _has_rate_line(data):
+            return bytes(data)
+        if attempt < DOWNLOAD_RETRIES:
+            # the board was still writing the summary line
+            await asyncio.sleep(CAPTURE_POLL_INTERVAL)
+    raise HomeAssistantError(f"{path} is incomplete, it has no sample rate")
+
+
+def _has_rate_line(data) -> bool:
+    """Return True if the last line of a CSV is the summary line."""
+    return data.rstrip().rpartition(b"\n")[2].strip().startswith(b"Rate")
+
+
+def parse_accelerometer_csv(data: bytes):
+    """Return the samples per axis and the sample rate of an M956 CSV."""
+    import numpy as np
+
+    lines = data.strip().split(b"\n")
+    header, summary = lines[0].strip(), lines[-1].strip()
+    if not header.startswith(b"Sample") or not summary.startswith(b"Rate"):
+        raise HomeAssistantError("Not an accelerometer CSV")
+    # summary line, e.g. "Rate 1344 overflows 0"
+    rate = float(summary.split()[1])
+    axes = [axis.strip().decode() for axis in header.split(b",")[1:]]
+    rows = [line.strip() for line in lines[1:-1] if line.strip()]
+    try:
+        table = np.array(b",".join(rows).split(b","), dtype=bytes).astype(np.float32)
+        table = table.reshape(len(rows), len(axes) + 1)
+    except ValueError:
+        # a malformed line, parse line by line and skip it
+        table = np.array(
+            [values for line in rows if (values := _parse_row(line, len(axes)))],
+            dtype=np.float32,
+        ).reshape(-1, len(axes) + 1)
+    return {axis: table[:, index + 1] for index, axis in enumerate(axes)}, rate
+
+
+def _parse_row(line: bytes, axis_count: int):
+    """Return the values of one CSV line, or None if it is malformed."""
+    try:
+        values = [float(value) for value in line.split(b",")]
+    except ValueError:
+        return None
+    return values if len(values) == axis_count + 1 else None
+
+
+def analyze_resonance(columns, rate: float):
+    """Return the dominant peaks and PSD per axis, using Welch's method."""
+    import numpy as np
+
+    result = {"sample_rate": rate, "axes": {}}
+    spectra = {}
+    for axis, values in columns.items():
+        samples = np.asarray(values, dtype=np.float64)
+        samples -= samples.mean()
+        segment_size = min(SEGMENT_SIZE, samples.size)
+        if segment_size < 8:
+            continue
+        window = np.hanning(segment_size)
+        segments = np.lib.stride_tricks.sliding_window_view(samples, segment_size)[
+            :: segment_size // 2
+        ]
+        spectrum = np.abs(np.fft.rfft(segments * window, axis=1)) ** 2
+        psd = spectrum.mean(axis=0) / (rate * np.sum(window**2))
+        frequencies = np.fft.rfftfreq(segment_size, 1 / rate)
+
+        # local maxima above the lowest frequency of interest
+        is_peak = np.zeros_like(psd, dtype=bool)
+        is_peak[1:-1] = (psd[1:-1] > psd[:-2]) & (psd[1:-1] >= psd[2:])
+        is_peak &= frequencies >= MIN_FREQUENCY
+        peak_indices = np.flatnonzero(is_peak)
+        peak_indices = peak_indices[np.argsort(psd[peak_indices])[::-1][:PEAK_COUNT]]
+        result["axes"][axis] = {
+            "samples": int(samples.size),
+            "peaks": [
+                {
+                    "frequency": round(float(frequencies[index]), 1),
+                    "power": float(psd[index]),
+                }
+                for index in peak_indices
+            ],
+        }
+        spectra[axis] = (frequencies, psd)
+    return result, spectra
+
+
+def render_spectrum(spectra):
+    """Return a PNG plot of the power spectral densities, log scaled."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (IMAGE_WIDTH, IMAGE_HEIGHT), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    if not spectra:
+        return _to_png(image)
+
+    max_frequency = max(frequencies[-1] for frequencies, _ in spectra.values())
+    log_psd = {
+        axis: np.log10(np.maximum(psd, np.finfo(float).tiny))
+        for axis, (_, psd) in spectra.items()
+    }
+    high = max(float(values.max()) for values in log_psd.values())
+    low = min(float(values[1:].min()) for values in log_psd.values())
+    # an idle axis would otherwise flatten the others against the top
+    low = max(low, high - DYNAMIC_RANGE)
+    span = (high - low) or 1.0
+    for axis, (frequencies, _) in spectra.items():
+        x = frequencies / max_frequency * (IMAGE_WIDTH - 1)
+        y = (1 - (log_psd[axis] - low) / span) * (IMAGE_HEIGHT - 1)
+        points = np.column_stack((x, np.clip(y, 0, IMAGE_HEIGHT - 1)))[1:]
+        draw.line(
+            [tuple(point) for point in points.tolist()],
+            fill=AXIS_COLORS.get(axis, (0, 0, 0)),
+            width=2,
+        )
+        draw.text(
+            (10, 10 + 14 * list(spectra).index(axis)),
+            axis,
+            fill=AXIS_COLORS.get(axis, (0, 0, 0)),
+        )
+    draw.text(
+        (IMAGE_WIDTH - 90, IMAGE_HEIGHT - 16), f"{max_frequency:.0f} Hz", fill=(0, 0, 0)
+    )
+    return _to_png(image)
+
+
+def _to_png(image) -> bytes:
+    with io.BytesIO() as output:
+        image.save(output, format="PNG")
+        return output.getvalue()
+
+
+def process_resonance(data: bytes, image_path: str | None):
+    """Parse and analyze a capture and write the spectrum image, in the executor."""
+    result, spectra = analyze_resonance(*parse_accelerometer_csv(data))
+    if image_path is not None:
+        with open(image_path, "wb") as image_file:
+            image_file.write(render_spectrum(spectra))
+        result["image"] = image_path
+    return result
@@ -0,0 +1,81 @@
+"""Support for selecting the G-code file to print on a Duet3D printer."""
+import logging
+
+from homeassistant.components.select import SelectEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import DuetDataUpdateCoordinator
+from .const import CONF_STANDALONE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+):
+    """Set up the Duet3D file select."""
+    coordinator: DuetDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+        "coordinator"
+    ]
+    device_id = config_entry.entry_id
+    assert device_id is not None
+    async_add_entities([DuetFileSelect(coordinator, "File", device_id)])
+
+
+class DuetFileSelect(CoordinatorEntity[DuetDataUpdateCoordinator], SelectEntity):
+    """Select one of the G-code files stored on the printer."""
+
+    _attr_icon = "mdi:file-cog"
+
+    def __init__(
+        self, coordinator: DuetDataUpdateCoordinator, select_name: str, device_id: str
+    ) -> None:
+        """Initialize a new Duet3D file select."""
+        super().__init__(coordinator)
+        self._device_id = device_id
+        self._attr_name = f"{self.device_info['name']} {select_name}"
+        self._attr_unique_id = f"{select_name}-{device_id}"
+        # standalone boards count volume changes, DSF only reports the volumes
+        self._sensor_types = (
+            ("Volumes Sequence",)
+            if coordinator.config_entry.data[CONF_STANDALONE]
+            else ("Volumes",)
+        )
+
+    @property
+    def device_info(self):
+        """Device info."""
+        return self.coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Request the volume change marker from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types(self._sensor_types)
+        )
+
+    @property
+    def options(self) -> list[str]:
+        """Return the most recent G-code files on the printer and the selected one."""
+        file_list = self.coordinator.file_list
+        selected_file = self.coordinator.selected_file
+        if selected_file in file_list and selected_file not in file_list.recent:
+            return sorted([*file_list.recent, selected_file])
+        return file_list.recent
+
+    @property
+    def current_option(self) -> str | None:
+        """Return the selected file."""
+        if self.coordinator.selected_file in self.coordinator.file_list:
+            return self.coordinator.selected_file
+        return None
+
+    async def async_select_option(self, option: str) -> None:
+        """Select the file duet3d.start_print prints by default."""
+        self.coordinator.selected_file = option
+        self.async_write_ha_state()
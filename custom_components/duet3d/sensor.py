@@ -7,11 +7,19 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfTemperature
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfLength,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+import homeassistant.util.dt as dt_util
 from . import DuetDataUpdateCoordinator
+from .custom_sensors import get_sensor_type
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,6 +31,8 @@ from .const import (
     SENSOR_TYPES,
     PRINTER_STATUS,
     CONF_STANDALONE,
+    HISTORY_SENSOR_TYPES,
+    SIGNAL_OPTIONS_UPDATED,
 )
 
 
@@ -36,7 +46,7 @@ async def async_setup_entry(
         "coordinator"
     ]
 
-    tools = coordinator.get_tools()
+    tools = list(coordinator.get_tools())
     device_id = config_entry.entry_id
     assert device_id is not None
 
@@ -52,12 +62,13 @@ async def async_setup_entry(
             notification_id=NOTIFICATION_ID,
         )
     known_tools = set()
+    bed_sensors = []
 
     @callback
     def async_add_tool_sensors() -> None:
         tool_types = ["current", "active", "standby"]
         bed_types = ["current", "active"]
-        if not coordinator.data["status"]:
+        if coordinator.data["status"] is None:
             return
 
         new_tools = []
@@ -67,15 +78,15 @@ async def async_setup_entry(
                 for bed_type in bed_types:
                     if tool + "," + bed_type not in known_tools:
                         known_tools.add(tool + "," + bed_type)
-                        new_tools.append(
-                            DuetTemperatureSensor(
-                                coordinator,
-                                f"Tool {tool} {bed_type} temperature",
-                                tool,
-                                bed_type,
-                                device_id,
-                            )
+                        bed_sensor = DuetTemperatureSensor(
+                            coordinator,
+                            f"Tool {tool} {bed_type} temperature",
+                            tool,
+                            bed_type,
+                            device_id,
                         )
+                        bed_sensors.append(bed_sensor)
+                        new_tools.append(bed_sensor)
             else:
                 assert device_id is not None
                 for tool_type in tool_types:
@@ -94,7 +105,23 @@ async def async_setup_entry(
 
     config_entry.async_on_unload(coordinator.async_add_listener(async_add_tool_sensors))
 
-    if coordinator.data["status"]:
+    @callback
+    def async_options_updated() -> None:
+        """Add or remove the bed sensors after the bed option changed."""
+        tools[:] = coordinator.get_tools()
+        if "bed" not in tools:
+            known_tools.difference_update({"bed,current", "bed,active"})
+            while bed_sensors:
+                hass.async_create_task(bed_sensors.pop().async_remove())
+        async_add_tool_sensors()
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(device_id), async_options_updated
+        )
+    )
+
+    if coordinator.data["status"] is not None:
         async_add_tool_sensors()
 
     entities: list[SensorEntity] = [
@@ -106,13 +133,25 @@ async def async_setup_entry(
         DuetCurrentLayerSensor(coordinator, "Current Layer", device_id),
         DuetTotalLayersSensor(coordinator, "Total Layers", device_id),
         DuetFileNameSensor(coordinator, "File Name", device_id),
+        DuetLayerTimeSensor(coordinator, "Average Layer Time", device_id),
+        DuetLastMessageSensor(coordinator, "Last Message", device_id),
+        DuetHoursPrintedSensor(coordinator, "Hours Printed", device_id),
+        DuetFilamentUsedSensor(coordinator, "Filament Used", device_id),
+        DuetSuccessRateSensor(coordinator, "Print Success Rate", device_id),
     ]
+    entities.extend(
+        DuetCustomSensor(coordinator, custom_sensor, device_id)
+        for custom_sensor in coordinator.custom_sensors
+    )
     async_add_entities(entities)
 
 
 class DuetPrintSensorBase(CoordinatorEntity[DuetDataUpdateCoordinator], SensorEntity):
     """Representation of an Duet sensor."""
 
+    # SENSOR_TYPES keys the entity reads, only these are fetched from the board
+    _sensor_types: tuple[str, ...] = ()
+
     def __init__(
         self,
         coordinator: DuetDataUpdateCoordinator,
@@ -131,6 +170,13 @@ class DuetPrintSensorBase(CoordinatorEntity[DuetDataUpdateCoordinator], SensorEn
         """Device info."""
         return self.coordinator.device_info
 
+    async def async_added_to_hass(self) -> None:
+        """Request the object model keys this entity reads from the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_register_sensor_types(self._sensor_types)
+        )
+
 
 class DuetTemperatureSensor(DuetPrintSensorBase):
     """Representation of an Duet sensor."""
@@ -155,6 +201,9 @@ class DuetTemperatureSensor(DuetPrintSensorBase):
         )
         self._sensor_type = sensor_type
         self._no_of_tool = tool
+        self._sensor_types = (
+            ("Bed Temperatures",) if tool == "bed" else ("Tool Temperatures",)
+        )
 
     @property
     def native_value(self):
@@ -165,7 +214,10 @@ class DuetTemperatureSensor(DuetPrintSensorBase):
                 json_path + "." + self._sensor_type, "Bed Temperatures"
             )
             if self.coordinator.config_entry.data[CONF_STANDALONE]:
-                bed_heater = bed_heater[self._sensor_type]
+                # not fetched yet if the bed was only just enabled
+                if not isinstance(bed_heater, dict):
+                    return -1
+                bed_heater = bed_heater.get(self._sensor_type)
             if bed_heater is not None:
                 return bed_heater
             else:
@@ -175,7 +227,7 @@ class DuetTemperatureSensor(DuetPrintSensorBase):
             tool_heater = self.coordinator.get_sensor_state(
                 f"{json_path}", "Tool Temperatures"
             )
-            if tool_heater is not None:
+            if isinstance(tool_heater, (dict, list)):
                 return tool_heater[self._no_of_tool][self._sensor_type]
             else:
                 return -1
@@ -184,6 +236,7 @@ class DuetTemperatureSensor(DuetPrintSensorBase):
 class DuetPrintJobPercentageSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Progress", "Filament Extrusion")
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_icon = "mdi:file-percent"
 
@@ -225,6 +278,7 @@ class DuetPrintJobPercentageSensor(DuetPrintSensorBase):
 class DuetTimeRemainingSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Time Remaining",)
     _attr_native_unit_of_measurement = "min"
     # _attr_device_class = SensorDeviceClass.DURATION
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -256,6 +310,7 @@ class DuetTimeRemainingSensor(DuetPrintSensorBase):
 class DuetPrintDurationSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Time Elapsed",)
     _attr_native_unit_of_measurement = "min"
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -287,6 +342,7 @@ class DuetPrintDurationSensor(DuetPrintSensorBase):
 class DuetPrintPositionSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Position",)
     _attr_icon = "mdi:axis-x-arrow"
 
     def __init__(
@@ -325,6 +381,7 @@ class DuetPrintPositionSensor(DuetPrintSensorBase):
 class DuetCurrentStateSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Current State",)
     _attr_icon = "mdi:printer-3d"
 
     def __init__(
@@ -358,6 +415,7 @@ class DuetCurrentStateSensor(DuetPrintSensorBase):
 class DuetCurrentLayerSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
 
+    _sensor_types = ("Current Layer",)
     _attr_icon = "mdi:layers"
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -390,6 +448,8 @@ class DuetCurrentLayerSensor(DuetPrintSensorBase):
 
 class DuetTotalLayersSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
+
+    _sensor_types = ("Total Layers",)
     _attr_icon = "mdi:layers-triple"
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -422,6 +482,8 @@ class DuetTotalLayersSensor(DuetPrintSensorBase):
     
 class DuetFileNameSensor(DuetPrintSensorBase):
     """Representation of an Duet3D sensor."""
+
+    _sensor_types = ("File Name",)
     _attr_icon = "mdi:file"
 
     def __init__(
@@ -444,10 +506,212 @@ class DuetFileNameSensor(DuetPrintSensorBase):
         file_path = self.coordinator.get_sensor_state(
             file_name_json_path, self.sensor_name
         )
+        if not file_path:
+            return None
         file_name = os.path.splitext(os.path.basename(file_path))[0]
         return file_name
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success
\ No newline at end of file
+        return self.coordinator.last_update_success
+
+
+class DuetLayerTimeSensor(DuetPrintSensorBase):
+    """Representation of the layer timing statistics of the current job."""
+
+    # the file name and job duration tell a new job apart, the current layer
+    # guards against firmware that ignores the array offset of job.layers
+    _sensor_types = ("Layers", "File Name", "Time Elapsed", "Current Layer")
+    _attr_icon = "mdi:layers-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        sensor_name: str,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet3D sensor."""
+        super().__init__(
+            coordinator,
+            sensor_name,
+            f"{sensor_name}-{device_id}",
+        )
+
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        statistics = self.coordinator.layer_history.get_statistics()
+        if not statistics["layers"]:
+            return None
+        return round(statistics["average_layer_time"], 2)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the per-layer statistics of the current job."""
+        return self.coordinator.layer_history.get_statistics()
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.last_update_success
+
+
+class DuetLastMessageSensor(DuetPrintSensorBase):
+    """Representation of the last console message of a Duet3D printer."""
+
+    _attr_icon = "mdi:message-text"
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        sensor_name: str,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet3D sensor."""
+        super().__init__(
+            coordinator,
+            sensor_name,
+            f"{sensor_name}-{device_id}",
+        )
+        self._sensor_types = (
+            ("Reply Sequence",)
+            if coordinator.config_entry.data[CONF_STANDALONE]
+            else ("Messages",)
+        )
+
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        if not self.coordinator.messages:
+            return None
+        # states are limited to 255 characters
+        return self.coordinator.messages[-1]["content"][:255]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the type and time of the last message."""
+        if not self.coordinator.messages:
+            return None
+        message = self.coordinator.messages[-1]
+        return {
+            "type": message["type"],
+            "time": message["time"],
+            "content": message["content"],
+        }
+
+
+class DuetPrintHistorySensor(DuetPrintSensorBase):
+    """Representation of a total of the print history of a Duet3D printer."""
+
+    _sensor_types = HISTORY_SENSOR_TYPES
+    _statistic: str
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        sensor_name: str,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet3D sensor."""
+        super().__init__(
+            coordinator,
+            sensor_name,
+            f"{sensor_name}-{device_id}",
+        )
+
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        return self.coordinator.print_history.get_statistics()[self._statistic]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the totals of the current month."""
+        month = dt_util.now().strftime("%Y-%m")
+        return {
+            "this_month": self.coordinator.print_history.get_statistics(month)[
+                self._statistic
+            ]
+        }
+
+
+class DuetHoursPrintedSensor(DuetPrintHistorySensor):
+    """Representation of the hours a Duet3D printer has printed."""
+
+    _statistic = "hours"
+    _attr_icon = "mdi:timer-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+
+class DuetFilamentUsedSensor(DuetPrintHistorySensor):
+    """Representation of the filament a Duet3D printer has used."""
+
+    _statistic = "filament"
+    _attr_icon = "mdi:printer-3d-nozzle"
+    _attr_native_unit_of_measurement = UnitOfLength.MILLIMETERS
+    _attr_device_class = SensorDeviceClass.DISTANCE
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+
+class DuetSuccessRateSensor(DuetPrintHistorySensor):
+    """Representation of the share of jobs a Duet3D printer completed."""
+
+    _statistic = "success_rate"
+    _attr_icon = "mdi:check-decagram"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        success_rate = super().native_value
+        return None if success_rate is None else round(success_rate * 100, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the job counts."""
+        statistics = self.coordinator.print_history.get_statistics()
+        return {"jobs": statistics["jobs"], "completed": statistics["completed"]}
+
+
+class DuetCustomSensor(DuetPrintSensorBase):
+    """Representation of a user defined object model value."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: DuetDataUpdateCoordinator,
+        custom_sensor,
+        device_id: str,
+    ) -> None:
+        """Initialize a new Duet3D sensor."""
+        super().__init__(
+            coordinator,
+            custom_sensor["name"],
+            f"custom-{custom_sensor['path']}-{device_id}",
+        )
+        self._sensor_type = get_sensor_type(custom_sensor["path"])
+        self._sensor_types = (self._sensor_type,)
+        self._attr_native_unit_of_measurement = custom_sensor["unit"]
+        self._attr_device_class = custom_sensor["device_class"]
+        if custom_sensor["unit"] is None and custom_sensor["device_class"] is None:
+            # text values such as states have no statistics
+            self._attr_state_class = None
+
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        value = self.coordinator.get_sensor_state(
+            self.coordinator.sensor_types[self._sensor_type]["json_path"],
+            self._sensor_type,
+        )
+        if value == "" or isinstance(value, (dict, list)):
+            return None
+        return value
@@ -2,77 +2,263 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import aiohttp
-import async_timeout
-import homeassistant.util.dt as dt_util
 
+import async_timeout
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    CONF_HOST,
-    CONF_PORT,
-    CONF_SSL,
+    ATTR_AREA_ID,
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    EVENT_HOMEASSISTANT_STOP,
 )
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.service import async_extract_config_entry_ids
 from .const import (
+    ATTR_ACCELEROMETER,
+    ATTR_ALL,
+    ATTR_CONFIG_ENTRY,
+    ATTR_DESTINATION,
+    ATTR_FILE,
     ATTR_GCODE,
+    ATTR_IMAGE,
+    ATTR_MODE,
+    ATTR_MONTH,
+    ATTR_PATH,
+    ATTR_SAMPLES,
+    ATTR_SOURCE,
+    ATTR_TIMEOUT,
+    BROADCAST_CONCURRENCY,
+    DEFAULT_BROADCAST_TIMEOUT,
+    GCODE_REFRESH_KEYS,
+    PRINT_REFRESH_KEYS,
     SERVICE_SEND_GCODE,
+    SERVICE_UPLOAD_FILE,
+    SERVICE_DOWNLOAD_FILE,
+    SERVICE_START_PRINT,
+    SERVICE_ANALYZE_RESONANCE,
+    SERVICE_ANALYZE_GCODE,
+    SERVICE_BROADCAST_GCODE,
+    SERVICE_QUERY,
+    SERVICE_PRINT_HISTORY,
+    GCODES_DIRECTORY,
     DOMAIN,
-    CONF_SBC_GCODE_PATH,
-    CONF_SBC_API,
-    CONF_STANDALONE,
-    CONF_STANDALONE_GCODE_PATH,
-    CONF_TEXT_PLAIN_HEADER,
 )
+from .dsf import DsfError
+from .preflight import GcodeAnalyzer
+from .query import compile_query, evaluate_query
+from .resonance import (
+    async_capture_accelerometer,
+    async_download_accelerometer_csv,
+    process_resonance,
+)
+from .transfer import async_download_file, async_upload_file, is_download_path_allowed
 
 _LOGGER = logging.getLogger(__name__)
 
+TARGET_KEYS = (
+    ATTR_AREA_ID,
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    # ATTR_FLOOR_ID and ATTR_LABEL_ID, which Home Assistant before 2024.4 lacks
+    "floor_id",
+    "label_id",
+)
+
+
+def valid_query(value):
+    """Validate an object model query."""
+    try:
+        compile_query(value)
+    except ValueError as err:
+        raise vol.Invalid(str(err)) from err
+    return value
+
 
 def async_register_services(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    def get_coordinator(call: ServiceCall):
+        """Return the coordinator of the printer a service call targets."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY, config_entry.entry_id)
+        if entry_id not in hass.data.get(DOMAIN, {}):
+            raise HomeAssistantError(f"Duet3D printer {entry_id} is not loaded")
+        return hass.data[DOMAIN][entry_id]["coordinator"]
+
+    gcode_analyzer = GcodeAnalyzer(hass)
+
     async def send_gcode(call: ServiceCall):
         """Send G-code to the printer."""
-        if config_entry.data[CONF_STANDALONE]:
-            url = "http{0}://{1}:{2}{3}".format(
-                "s" if config_entry.data[CONF_SSL] else "",
-                config_entry.data[CONF_HOST],
-                config_entry.data[CONF_PORT],
-                CONF_STANDALONE_GCODE_PATH,
+        coordinator = get_coordinator(call)
+        try:
+            reply = await coordinator.send_gcode(call.data[ATTR_GCODE])
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError, DsfError) as error:
+            raise ConnectionError(
+                f"Error communicating with printer at {coordinator.base_url}"
+            ) from error
+        coordinator.async_request_targeted_refresh(GCODE_REFRESH_KEYS)
+        return reply
+
+    async def broadcast_gcode(call: ServiceCall):
+        """Send G-code to several printers at once."""
+        printers = hass.data.get(DOMAIN, {})
+        if call.data[ATTR_ALL]:
+            entry_ids = set(printers)
+        elif ATTR_CONFIG_ENTRY in call.data or any(
+            key in call.data for key in TARGET_KEYS
+        ):
+            # targets may resolve to entries of other integrations, skip those
+            entry_ids = set(call.data.get(ATTR_CONFIG_ENTRY, []))
+            entry_ids |= set(printers) & await async_extract_config_entry_ids(
+                hass, call
             )
         else:
-            url = "http{0}://{1}:{2}{3}{4}".format(
-                "s" if config_entry.data[CONF_SSL] else "",
-                config_entry.data[CONF_HOST],
-                config_entry.data[CONF_PORT],
-                CONF_SBC_API,
-                CONF_SBC_GCODE_PATH,
+            raise HomeAssistantError(
+                "Choose a target or printers, or set all to send to every printer"
             )
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+        async def send(entry_id):
+            if entry_id not in printers:
+                return {"success": False, "error": "not loaded"}
+            coordinator = printers[entry_id]["coordinator"]
+            # the timeout starts once the printer's turn has come
+            async with semaphore:
+                try:
+                    async with async_timeout.timeout(call.data[ATTR_TIMEOUT]):
+                        reply = await coordinator.send_gcode(call.data[ATTR_GCODE])
+                except asyncio.TimeoutError:
+                    return {"success": False, "error": "timeout"}
+                except (aiohttp.ClientError, OSError, DsfError) as error:
+                    return {"success": False, "error": repr(error)}
+            coordinator.async_request_targeted_refresh(GCODE_REFRESH_KEYS)
+            return {"success": True, "reply": reply}
+
+        entry_ids = sorted(entry_ids)
+        results = await asyncio.gather(*(send(entry_id) for entry_id in entry_ids))
+        return {"printers": dict(zip(entry_ids, results))}
+
+    async def upload_file(call: ServiceCall):
+        """Stream a file from the Home Assistant host to the printer."""
+        coordinator = get_coordinator(call)
+        source = call.data[ATTR_SOURCE]
+        destination = call.data.get(
+            ATTR_DESTINATION, "0:/gcodes/" + os.path.basename(source)
+        )
         try:
-            async with aiohttp.ClientSession() as session:
-                with async_timeout.timeout(10):
-                    if config_entry.data[CONF_STANDALONE]:
-                        params = {"gcode": call.data[ATTR_GCODE]}
-
-                        response = await session.get(
-                            url,
-                            params=params,
-                            headers=CONF_TEXT_PLAIN_HEADER,
-                            ssl=False,
-                        )
-                    else:
-                        response = await session.post(
-                            url,
-                            data=call.data[ATTR_GCODE],
-                            headers=CONF_TEXT_PLAIN_HEADER,
-                            ssl=False,
-                        )
-                    response.raise_for_status()
-                    if response.status == 200:
-                        return await response.text()
+            return await async_upload_file(coordinator, source, destination)
         except (asyncio.TimeoutError, aiohttp.ClientError) as error:
+            raise HomeAssistantError(
+                f"Error uploading {source} to printer at {coordinator.base_url}"
+            ) from error
+
+    async def download_file(call: ServiceCall):
+        """Stream a file from the printer to the Home Assistant host."""
+        coordinator = get_coordinator(call)
+        source = call.data[ATTR_SOURCE]
+        try:
+            return await async_download_file(
+                coordinator, source, call.data[ATTR_DESTINATION]
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as error:
+            raise HomeAssistantError(
+                f"Error downloading {source} from printer at {coordinator.base_url}"
+            ) from error
+
+    async def start_print(call: ServiceCall):
+        """Start printing a file from the printer's G-code directory."""
+        coordinator = get_coordinator(call)
+        file_name = call.data.get(ATTR_FILE, coordinator.selected_file)
+        if not file_name:
+            raise HomeAssistantError("No file given and no file selected")
+        if coordinator.file_list.names and file_name not in coordinator.file_list:
+            raise HomeAssistantError(f"{file_name} is not in {GCODES_DIRECTORY}")
+        try:
+            reply = await coordinator.send_gcode(
+                f'M32 "{GCODES_DIRECTORY}/{file_name}"'
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError, DsfError) as error:
             raise ConnectionError(
-                f"Error communicating with printer at {url}"
+                f"Error communicating with printer at {coordinator.base_url}"
+            ) from error
+        coordinator.async_request_targeted_refresh(PRINT_REFRESH_KEYS)
+        return reply
+
+    async def analyze_resonance(call: ServiceCall):
+        """Capture accelerometer data and return its resonance peaks."""
+        coordinator = get_coordinator(call)
+        image_path = call.data.get(ATTR_IMAGE)
+        if image_path is not None:
+            if not (
+                is_download_path_allowed(hass, image_path)
+                or hass.config.is_allowed_path(image_path)
+            ):
+                raise HomeAssistantError(
+                    f"{image_path} is not inside the config, a media or an "
+                    "allowlisted directory"
+                )
+            image_dir = os.path.dirname(os.path.abspath(image_path))
+            if not await hass.async_add_executor_job(os.path.isdir, image_dir):
+                raise HomeAssistantError(f"The directory {image_dir} does not exist")
+        try:
+            path = await async_capture_accelerometer(
+                coordinator,
+                call.data[ATTR_ACCELEROMETER],
+                call.data[ATTR_SAMPLES],
+                call.data[ATTR_MODE],
+            )
+            data = await async_download_accelerometer_csv(coordinator, path)
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError, DsfError) as error:
+            raise HomeAssistantError(
+                f"Error reading accelerometer data from {coordinator.base_url}"
+            ) from error
+        try:
+            result = await hass.async_add_executor_job(
+                process_resonance, data, image_path
+            )
+        except OSError as error:
+            raise HomeAssistantError(f"Cannot write {image_path}: {error}") from error
+        result["file"] = path
+        return result
+
+    async def query(call: ServiceCall):
+        """Return object model values from the printer's latest model mirror."""
+        coordinator = get_coordinator(call)
+        try:
+            await coordinator.async_fetch_query_keys(call.data[ATTR_PATH])
+        except ValueError as error:
+            raise HomeAssistantError(str(error)) from error
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError, DsfError) as error:
+            raise HomeAssistantError(
+                f"Error reading the object model of {coordinator.base_url}"
             ) from error
+        last_read_time = coordinator.data["last_read_time"]
+        return {
+            "results": {
+                path: evaluate_query(path, coordinator.model)
+                for path in call.data[ATTR_PATH]
+            },
+            "last_read_time": last_read_time and last_read_time.isoformat(),
+        }
+
+    async def print_history(call: ServiceCall):
+        """Return the print history totals and the most recent jobs."""
+        history = get_coordinator(call).print_history
+        month = call.data.get(ATTR_MONTH)
+        return {
+            "totals": history.get_statistics(month),
+            "months": {
+                name: history.get_statistics(name) for name in sorted(history.months)
+            },
+            "recent": list(history.recent),
+        }
+
+    async def analyze_gcode(call: ServiceCall):
+        """Return the file info of a G-code file on the Home Assistant host."""
+        return await gcode_analyzer.async_analyze(call.data[ATTR_SOURCE])
 
     if not hass.services.has_service(DOMAIN, SERVICE_SEND_GCODE):
         _LOGGER.debug("Registering service now!")
@@ -80,5 +266,133 @@ def async_register_services(hass: HomeAssistant, config_entry: ConfigEntry) -> N
             DOMAIN,
             SERVICE_SEND_GCODE,
             send_gcode,
-            schema=vol.Schema({vol.Required(ATTR_GCODE): str}),
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_GCODE): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_BROADCAST_GCODE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_BROADCAST_GCODE,
+            broadcast_gcode,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_GCODE): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): vol.All(cv.ensure_list, [str]),
+                    vol.Optional(ATTR_ALL, default=False): cv.boolean,
+                    vol.Optional(
+                        ATTR_TIMEOUT, default=DEFAULT_BROADCAST_TIMEOUT
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    **cv.TARGET_SERVICE_FIELDS,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_UPLOAD_FILE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_UPLOAD_FILE,
+            upload_file,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_SOURCE): str,
+                    vol.Optional(ATTR_DESTINATION): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_DOWNLOAD_FILE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_DOWNLOAD_FILE,
+            download_file,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_SOURCE): str,
+                    vol.Required(ATTR_DESTINATION): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_START_PRINT):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_START_PRINT,
+            start_print,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_FILE): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_ANALYZE_RESONANCE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_ANALYZE_RESONANCE,
+            analyze_resonance,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_ACCELEROMETER, default="0"): str,
+                    vol.Optional(ATTR_SAMPLES, default=1000): vol.All(
+                        vol.Coerce(int), vol.Range(min=1)
+                    ),
+                    vol.Optional(ATTR_MODE, default=0): vol.All(
+                        vol.Coerce(int), vol.Range(min=0)
+                    ),
+                    vol.Optional(ATTR_IMAGE): str,
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_ANALYZE_GCODE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_ANALYZE_GCODE,
+            analyze_gcode,
+            schema=vol.Schema({vol.Required(ATTR_SOURCE): str}),
+            supports_response=SupportsResponse.ONLY,
+        )
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, lambda event: gcode_analyzer.shutdown()
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_QUERY):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_QUERY,
+            query,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_PATH): vol.All(cv.ensure_list, [valid_query]),
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+            supports_response=SupportsResponse.ONLY,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_PRINT_HISTORY):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_PRINT_HISTORY,
+            print_history,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_MONTH): vol.Match(r"^\d{4}-\d{2}$"),
+                    vol.Optional(ATTR_CONFIG_ENTRY): str,
+                }
+            ),
+            supports_response=SupportsResponse.ONLY,
         )
@@ -0,0 +1,134 @@
+"""Trace of the tool positions of the current job and its rendering.
+
+NumPy and Pillow are imported inside the render function, which runs in
+the executor, so loading the integration does not import them.
+"""
+from array import array
+import io
+
+# positions held, at a 1 s update interval about an hour of printing
+TRACE_CAPACITY = 4096
+IMAGE_SIZE = 480
+MARGIN = 8
+BACKGROUND_COLOR = (24, 24, 24)
+BED_COLOR = (48, 48, 48)
+PREVIOUS_LAYERS_COLOR = (96, 96, 96)
+CURRENT_LAYER_COLOR = (255, 140, 0)
+POSITION_COLOR = (255, 255, 255)
+
+
+class ToolpathTrace:
+    """Ring buffer of the XY positions and layers sampled during a job."""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY) -> None:
+        """Initialize an empty trace holding up to capacity positions."""
+        self.capacity = capacity
+        self.x = array("d", bytes(8 * capacity))
+        self.y = array("d", bytes(8 * capacity))
+        self.layers = array("l", [0]) * capacity
+        self._next = 0
+        self._count = 0
+        # incremented with every change, to render only new traces
+        self.version = 0
+        # (x min, x max, y min, y max) of the bed, None if unknown
+        self.bounds = None
+        self.file_name = None
+        self.job_duration = None
+
+    def __len__(self) -> int:
+        """Return the number of positions held."""
+        return self._count
+
+    def reset(self) -> None:
+        """Forget the positions of the previous job."""
+        self._next = 0
+        self._count = 0
+        self.version += 1
+
+    def check_job(self, file_name, job_duration) -> None:
+        """Reset the trace when a different job is running."""
+        if file_name != self.file_name or (
+            job_duration is not None
+            and self.job_duration is not None
+            and job_duration < self.job_duration
+        ):
+            self.reset()
+        self.file_name = file_name
+        self.job_duration = job_duration
+
+    def append(self, x: float, y: float, layer: int) -> None:
+        """Add a position, overwriting the oldest one if the trace is full."""
+        if self._count:
+            last = (self._next - 1) % self.capacity
+            if (self.x[last], self.y[last], self.layers[last]) == (x, y, layer):
+                return
+        self.x[self._next] = x
+        self.y[self._next] = y
+        self.layers[self._next] = layer
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.version += 1
+
+    def snapshot(self):
+        """Return copies of the x, y and layer arrays, oldest position first."""
+        if self._count < self.capacity:
+            return (
+                self.x[: self._count],
+                self.y[: self._count],
+                self.layers[: self._count],
+            )
+        start = self._next
+        return (
+            self.x[start:] + self.x[:start],
+            self.y[start:] + self.y[:start],
+            self.layers[start:] + self.layers[:start],
+        )
+
+
+def render_toolpath(xs, ys, layers, bounds):
+    """Return a PNG of the XY trace, the last layer highlighted, Y pointing up."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    x = np.frombuffer(xs, dtype=np.float64)
+    y = np.frombuffer(ys, dtype=np.float64)
+    layer = np.asarray(layers)
+    current_layer = layer[-1]
+    if bounds is None:
+        bounds = (x.min(), x.max(), y.min(), y.max())
+    x_min, x_max, y_min, y_max = bounds
+    width, height = max(x_max - x_min, 1e-3), max(y_max - y_min, 1e-3)
+    scale = (IMAGE_SIZE - 2 * MARGIN) / max(width, height)
+    size = (round(width * scale) + 2 * MARGIN, round(height * scale) + 2 * MARGIN)
+
+    # pixel coordinates of all positions at once
+    columns = MARGIN + (x - x_min) * scale
+    rows = size[1] - 1 - MARGIN - (y - y_min) * scale
+    points = np.column_stack((columns, rows)).round().astype(int)
+
+    image = Image.new("RGB", size, BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(
+        (MARGIN, MARGIN, size[0] - 1 - MARGIN, size[1] - 1 - MARGIN), fill=BED_COLOR
+    )
+    # one polyline per run of positions on the same layer, current layer last
+    run_starts = np.flatnonzero(np.diff(layer)) + 1
+    runs = np.split(np.arange(len(layer)), run_starts)
+    runs.sort(key=lambda run: layer[run[0]] == current_layer)
+    for run in runs:
+        color = (
+            CURRENT_LAYER_COLOR
+            if layer[run[0]] == current_layer
+            else PREVIOUS_LAYERS_COLOR
+        )
+        line = [tuple(point) for point in points[run].tolist()]
+        if len(line) > 1:
+            draw.line(line, fill=color, width=2, joint="curve")
+        else:
+            draw.point(line, fill=color)
+    column, row = points[-1].tolist()
+    draw.ellipse((column - 4, row - 4, column + 4, row + 4), outline=POSITION_COLOR)
+
+    with io.BytesIO() as output:
+        image.save(output, format="PNG")
+        return output.getvalue()
@@ -0,0 +1,160 @@
+"""Streaming file transfers between Home Assistant and a Duet3D board."""
+from __future__ import annotations
+
+import os
+import time
+import zlib
+from datetime import datetime
+from urllib.parse import quote
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    CONF_SBC_API,
+    CONF_SBC_FILE_PATH,
+    CONF_STANDALONE,
+    CONF_STANDALONE_DOWNLOAD_PATH,
+    CONF_STANDALONE_UPLOAD_PATH,
+    PRIORITY_TRANSFER,
+    TRANSFER_CHUNK_SIZE,
+)
+
+
+def is_download_path_allowed(hass, path: str) -> bool:
+    """Return True if path is inside the config or a media directory."""
+    path = os.path.realpath(path)
+    allowed_dirs = [hass.config.config_dir, *hass.config.media_dirs.values()]
+    return any(
+        os.path.commonpath([path, os.path.realpath(allowed_dir)])
+        == os.path.realpath(allowed_dir)
+        for allowed_dir in allowed_dirs
+    )
+
+
+def get_sbc_file_url(coordinator, path: str) -> str:
+    """Return the DSF URL of a file on the printer's storage."""
+    return "{0}{1}{2}/{3}".format(
+        coordinator.base_url, CONF_SBC_API, CONF_SBC_FILE_PATH, quote(path, safe="/:")
+    )
+
+
+async def async_upload_file(coordinator, source: str, destination: str):
+    """Stream a local file to the printer, return the transfer statistics."""
+    hass = coordinator.hass
+    if not hass.config.is_allowed_path(source):
+        raise HomeAssistantError(f"Access to {source} is not allowed")
+    try:
+        file_stat = await hass.async_add_executor_job(os.stat, source)
+    except OSError as err:
+        raise HomeAssistantError(f"Cannot read {source}: {err}") from err
+
+    checksum = 0
+
+    async def read_chunks():
+        nonlocal checksum
+        file = await hass.async_add_executor_job(open, source, "rb")
+        try:
+            while chunk := await hass.async_add_executor_job(
+                file.read, TRANSFER_CHUNK_SIZE
+            ):
+                checksum = zlib.crc32(chunk, checksum)
+                yield chunk
+        finally:
+            await hass.async_add_executor_job(file.close)
+
+    headers = {"Content-Length": str(file_stat.st_size)}
+    if coordinator.config_entry.data[CONF_STANDALONE]:
+        method = "POST"
+        url = coordinator.base_url + CONF_STANDALONE_UPLOAD_PATH
+        params = {
+            "name": destination,
+            "time": datetime.fromtimestamp(file_stat.st_mtime).isoformat(
+                timespec="seconds"
+            ),
+        }
+    else:
+        method = "PUT"
+        url = get_sbc_file_url(coordinator, destination)
+        params = None
+
+    async with coordinator.upload_semaphore:
+        start = time.monotonic()
+        async with coordinator.async_stream(
+            method,
+            url,
+            PRIORITY_TRANSFER,
+            params=params,
+            data=read_chunks(),
+            headers=headers,
+        ) as response:
+            if coordinator.config_entry.data[CONF_STANDALONE]:
+                result = await response.json(content_type=None)
+                if result.get("err"):
+                    raise HomeAssistantError(
+                        f"The printer rejected the upload of {source}"
+                    )
+        duration = time.monotonic() - start
+
+    return {
+        "destination": destination,
+        "bytes": file_stat.st_size,
+        "crc32": f"{checksum:08x}",
+        "duration": round(duration, 3),
+        "throughput": round(file_stat.st_size / duration) if duration else None,
+        "buffer_bytes": TRANSFER_CHUNK_SIZE,
+    }
+
+
+async def async_download_file(coordinator, source: str, destination: str):
+    """Stream a file from the printer to disk, resuming a partial download."""
+    hass = coordinator.hass
+    if not is_download_path_allowed(hass, destination):
+        raise HomeAssistantError(
+            f"{destination} is not inside the config or a media directory"
+        )
+    partial_path = destination + ".part"
+
+    def get_partial_size():
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        try:
+            return os.path.getsize(partial_path)
+        except FileNotFoundError:
+            return 0
+
+    if coordinator.config_entry.data[CONF_STANDALONE]:
+        url = coordinator.base_url + CONF_STANDALONE_DOWNLOAD_PATH
+        params = {"name": source}
+    else:
+        url = get_sbc_file_url(coordinator, source)
+        params = None
+
+    async with coordinator.download_semaphore:
+        resumed_from = await hass.async_add_executor_job(get_partial_size)
+        headers = {"Range": f"bytes={resumed_from}-"} if resumed_from else None
+        received = 0
+        start = time.monotonic()
+        async with coordinator.async_stream(
+            "GET", url, PRIORITY_TRANSFER, params=params, headers=headers
+        ) as response:
+            if response.status != 206:
+                # the board ignored the range, start over
+                resumed_from = 0
+            file = await hass.async_add_executor_job(
+                open, partial_path, "ab" if resumed_from else "wb"
+            )
+            try:
+                async for chunk in response.content.iter_chunked(TRANSFER_CHUNK_SIZE):
+                    await hass.async_add_executor_job(file.write, chunk)
+                    received += len(chunk)
+            finally:
+                await hass.async_add_executor_job(file.close)
+        duration = time.monotonic() - start
+        await hass.async_add_executor_job(os.replace, partial_path, destination)
+
+    return {
+        "destination": destination,
+        "bytes": resumed_from + received,
+        "resumed_from": resumed_from,
+        "duration": round(duration, 3),
+        "throughput": round(received / duration) if duration else None,
+    }
@@ -0,0 +1,201 @@
+"""G-code parser of the pre-flight analysis, run in worker processes.
+
+This module only uses the standard library and is loaded from its file
+rather than from the integration package, so the worker processes import
+neither the package nor Home Assistant.
+"""
+import hashlib
+import re
+import time
+
+READ_SIZE = 1024 * 1024
+# base64 characters kept per thumbnail, a missing end marker stops there
+MAX_THUMBNAIL_DATA = 1024 * 1024
+
+THUMBNAIL_FORMATS = {
+    b"thumbnail": "png",
+    b"thumbnail_QOI": "qoi",
+    b"thumbnail_JPG": "jpeg",
+}
+THUMBNAIL_BEGIN = re.compile(rb"(thumbnail(?:_QOI|_JPG)?) begin (\d+)x(\d+) (\d+)")
+DURATION = re.compile(rb"(\d+(?:\.\d+)?)\s*([dhms])")
+NUMBER = re.compile(rb"[-+]?\d*\.?\d+")
+DURATION_SECONDS = {b"d": 86400, b"h": 3600, b"m": 60, b"s": 1}
+WORDS = {letter: re.compile(letter + rb"([-+]?\d*\.?\d+)") for letter in (b"E", b"Z")}
+
+
+def _parse_duration(text: bytes):
+    """Return the seconds of "1d 2h 3m 4s", or None."""
+    parts = DURATION.findall(text)
+    if not parts:
+        return None
+    return round(sum(float(value) * DURATION_SECONDS[unit] for value, unit in parts))
+
+
+def _parse_numbers(text: bytes):
+    return [float(value) for value in NUMBER.findall(text)]
+
+
+def _parse_number(text: bytes):
+    """Return the first number in text, or None."""
+    match = NUMBER.search(text)
+    return float(match[0]) if match else None
+
+
+def _get_word(code: bytes, letter: bytes):
+    """Return the value of one parameter of a G-code line, or None."""
+    match = WORDS[letter].search(code)
+    return float(match[1]) if match else None
+
+
+class _GcodeParser:
+    """State of a single pass over a G-code file."""
+
+    def __init__(self) -> None:
+        self.info = {
+            "height": 0.0,
+            "layerHeight": None,
+            "numLayers": None,
+            "filament": [],
+            "printTime": None,
+            "generatedBy": None,
+            "thumbnails": [],
+        }
+        self.layer_markers = 0
+        self.relative_extrusion = False
+        self.tool = 0
+        self.position_e = 0.0
+        self.extruded = []
+        self.z = 0.0
+        self.layer_z = []
+        self.thumbnail = None
+
+    def feed(self, line: bytes) -> None:
+        """Parse one line, without its line ending."""
+        code, _, comment = line.partition(b";")
+        code = code.strip().upper()
+        if not code:
+            # slicers write their metadata on lines of their own
+            if comment:
+                self._parse_comment(comment.strip())
+            return
+        if code[:3] in (b"G1 ", b"G0 "):
+            self._parse_move(code)
+        elif code.startswith(b"G92"):
+            position_e = _get_word(code, b"E")
+            if position_e is not None:
+                self.position_e = position_e
+        elif code.startswith(b"M82"):
+            self.relative_extrusion = False
+        elif code.startswith(b"M83"):
+            self.relative_extrusion = True
+        elif code.startswith(b"T") and code[1:].isdigit():
+            self.tool = int(code[1:])
+
+    def _parse_move(self, code: bytes) -> None:
+        if b"Z" in code:
+            z = _get_word(code, b"Z")
+            if z is not None:
+                self.z = z
+        if b"E" not in code:
+            return
+        e = _get_word(code, b"E")
+        if e is None:
+            return
+        delta = e if self.relative_extrusion else e - self.position_e
+        self.position_e = 0.0 if self.relative_extrusion else e
+        if delta <= 0 or (b"X" not in code and b"Y" not in code):
+            # retractions and the moves undoing them do not extrude
+            return
+        while len(self.extruded) <= self.tool:
+            self.extruded.append(0.0)
+        self.extruded[self.tool] += delta
+        if not self.layer_z or self.z > self.layer_z[-1]:
+            self.layer_z.append(self.z)
+
+    def _parse_comment(self, comment: bytes) -> None:
+        if self.thumbnail is not None:
+            if comment.startswith(b"thumbnail") and comment.endswith(b"end"):
+                self.thumbnail["data"] = self.thumbnail["data"].decode()
+                self.info["thumbnails"].append(self.thumbnail)
+                self.thumbnail = None
+            elif len(self.thumbnail["data"]) < MAX_THUMBNAIL_DATA:
+                self.thumbnail["data"] += comment
+            return
+
+        lower = comment.lower()
+        if lower.startswith((b"layer_change", b"layer:")):
+            self.layer_markers += 1
+        elif match := THUMBNAIL_BEGIN.match(comment):
+            self.thumbnail = {
+                "format": THUMBNAIL_FORMATS[match[1]],
+                "width": int(match[2]),
+                "height": int(match[3]),
+                "size": int(match[4]),
+                "data": b"",
+            }
+        elif lower.startswith((b"generated by", b"generated with")):
+            generator = comment.split(None, 2)[-1]
+            self.info["generatedBy"] = generator.decode(errors="replace")
+        elif lower.startswith(b"filament used [mm]"):
+            # PrusaSlicer, SuperSlicer and OrcaSlicer, one value per extruder
+            self.info["filament"] = _parse_numbers(comment.partition(b"=")[2])
+        elif lower.startswith(b"filament used:"):
+            # Cura, in metres
+            self.info["filament"] = [
+                value * 1000 for value in _parse_numbers(comment.partition(b":")[2])
+            ]
+        elif lower.startswith(b"filament length:"):
+            # Simplify3D
+            self.info["filament"] = _parse_numbers(comment.partition(b":")[2])[:1]
+        elif lower.startswith(b"estimated printing time (normal mode)"):
+            self.info["printTime"] = _parse_duration(comment.partition(b"=")[2])
+        elif lower.startswith(b"time:"):
+            time_seconds = _parse_number(comment[5:])
+            if time_seconds is not None:
+                self.info["printTime"] = round(time_seconds)
+        elif lower.startswith(b"build time:"):
+            self.info["printTime"] = _parse_duration(
+                comment[11:].replace(b"hours", b"h").replace(b"minutes", b"m")
+            )
+        elif lower.startswith((b"layer_count:", b"total layer number:")):
+            layers = _parse_number(comment)
+            if layers is not None:
+                self.info["numLayers"] = int(layers)
+        elif lower.startswith((b"layer_height =", b"layer height:")):
+            self.info["layerHeight"] = _parse_number(comment)
+
+    def result(self):
+        """Return the file info of the parsed file."""
+        info = self.info
+        if self.layer_z:
+            info["height"] = self.layer_z[-1]
+        if info["numLayers"] is None:
+            info["numLayers"] = self.layer_markers or len(self.layer_z)
+        if info["layerHeight"] is None and len(self.layer_z) > 1:
+            info["layerHeight"] = round(self.layer_z[1] - self.layer_z[0], 3)
+        if not info["filament"]:
+            info["filament"] = [round(value, 1) for value in self.extruded]
+        return info
+
+
+def parse_gcode_file(path: str):
+    """Parse a G-code file in chunks, in the same pass as hashing it.
+
+    Returns its file info, the BLAKE2b digest of its content and the parse
+    time.
+    """
+    start = time.perf_counter()
+    parser = _GcodeParser()
+    digest = hashlib.blake2b(digest_size=16)
+    pending = b""
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_SIZE):
+            digest.update(chunk)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                parser.feed(line.rstrip(b"\r"))
+    if pending:
+        parser.feed(pending.rstrip(b"\r"))
+    return parser.result(), digest.hexdigest(), time.perf_counter() - start
@@ -0,0 +1 @@
+"""Tests for the Duet3D integration."""
@@ -0,0 +1,54 @@
+"""Helpers shared by the tests."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duet3d import DuetDataUpdateCoordinator
+from custom_components.duet3d.model import get_json_value
+
+ENTRY_DATA = {
+    "name": "Printer",
+    "host": "127.0.0.1",
+    "port": 80,
+    "password": "",
+    "ssl": False,
+    "interval": 5,
+    "number_of_tools": 1,
+    "bed": True,
+    "light": False,
+    "standalone": True,
+}
+
+
+async def async_make_coordinator(config_dir, **data):
+    """Return a coordinator of a config entry with the given data.
+
+    Call hass.async_stop of the coordinator's hass when done.
+    """
+    hass = HomeAssistant(str(config_dir))
+    config_entry = SimpleNamespace(entry_id="entry", data={**ENTRY_DATA, **data})
+    return DuetDataUpdateCoordinator(hass, config_entry, config_entry.data["interval"])
+
+
+class FakeBoard:
+    """Answers the requests of a coordinator from a model, by object model key."""
+
+    def __init__(self, model):
+        self.model = model
+        self.requests = []
+        # requests to URLs containing one of these time out
+        self.failures = set()
+
+    async def async_request(self, method, url, priority, **kwargs):
+        self.requests.append(url)
+        if any(failure in url for failure in self.failures):
+            raise asyncio.TimeoutError
+        key = url.partition("key=")[2].partition("&")[0]
+        result = get_json_value(self.model, key)
+        return json.dumps({"key": key, "result": result}).encode()
+
+    def attach(self, coordinator):
+        """Answer the requests of the coordinator instead of a board."""
+        coordinator.async_request = self.async_request
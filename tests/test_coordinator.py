@@ -0,0 +1,119 @@
+"""Tests of the object model polling of the coordinator."""
+import asyncio
+
+import pytest
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .common import FakeBoard, async_make_coordinator
+
+
+def make_model(duration):
+    return {
+        "state": {"status": "processing"},
+        "job": {"duration": duration},
+    }
+
+
+def test_poll_after_failure_publishes_identical_bodies(tmp_path):
+    """Bodies decoded by a failed poll are not taken as unchanged next time."""
+
+    async def run():
+        coordinator = await async_make_coordinator(tmp_path)
+        board = FakeBoard(make_model(1))
+        board.attach(coordinator)
+        coordinator.async_register_sensor_types(["Current State", "Time Elapsed"])
+        try:
+            coordinator.data = await coordinator._async_update_data()
+            assert coordinator.data["status"]["Time Elapsed"] == 1
+
+            board.model = make_model(2)
+            # every body was decoded when processing the model fails
+            is_unchanged = coordinator._is_unchanged
+
+            def fail_once():
+                coordinator._is_unchanged = is_unchanged
+                raise UpdateFailed("processing")
+
+            coordinator._is_unchanged = fail_once
+            with pytest.raises(UpdateFailed):
+                await coordinator._async_update_data()
+
+            coordinator.data = data = await coordinator._async_update_data()
+            assert data["status"]["Time Elapsed"] == 2
+            assert data["status"]["Current State"] == "processing"
+
+            # identical bodies after a successful poll are skipped
+            assert await coordinator._async_update_data() is data
+        finally:
+            await coordinator.hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_failed_reply_does_not_fail_poll(tmp_path):
+    """A console reply that cannot be fetched is fetched with the next poll."""
+
+    async def run():
+        coordinator = await async_make_coordinator(tmp_path)
+        board = FakeBoard({"seqs": {"reply": 1}})
+        board.attach(coordinator)
+        coordinator.async_register_sensor_types(["Reply Sequence"])
+        try:
+            coordinator.data = await coordinator._async_update_data()
+            board.model = {"seqs": {"reply": 2}}
+            board.failures = {"rr_reply"}
+            coordinator.data = await coordinator._async_update_data()
+            assert coordinator.data["status"]["Reply Sequence"] == 2
+            assert not coordinator.messages
+        finally:
+            await coordinator.hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_failed_refresh_after_command(tmp_path):
+    """A refresh failing halfway does not make the next poll skip its bodies."""
+
+    async def run():
+        coordinator = await async_make_coordinator(tmp_path)
+        board = FakeBoard({"state": {"status": "idle"}, "job": {"layer": 1}})
+        board.attach(coordinator)
+        coordinator.async_register_sensor_types(["Current State", "Current Layer"])
+        try:
+            coordinator.data = await coordinator._async_update_data()
+
+            board.model = {"state": {"status": "idle"}, "job": {"layer": 2}}
+            # job.layer is fetched before state.status, which times out
+            board.failures = {"key=state"}
+            coordinator._refresh_keys = {"state", "job"}
+            await coordinator._async_targeted_refresh()
+
+            board.failures = set()
+            coordinator.data = await coordinator._async_update_data()
+            assert coordinator.data["status"]["Current Layer"] == 2
+        finally:
+            await coordinator.hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_refresh_waits_for_running_poll(tmp_path):
+    """A refresh after a command does not write the model during a poll."""
+
+    async def run():
+        coordinator = await async_make_coordinator(tmp_path)
+        board = FakeBoard({"state": {"status": "busy"}})
+        board.attach(coordinator)
+        coordinator.async_register_sensor_types(["Current State"])
+        try:
+            async with coordinator._model_lock:
+                coordinator._refresh_keys = {"state"}
+                refresh = asyncio.create_task(coordinator._async_targeted_refresh())
+                await asyncio.sleep(0.01)
+                assert not board.requests
+            await refresh
+            assert coordinator.data["status"]["Current State"] == "busy"
+        finally:
+            await coordinator.hass.async_stop(force=True)
+
+    asyncio.run(run())
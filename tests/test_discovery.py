@@ -0,0 +1,167 @@
+"""Tests of the board discovery against emulated boards."""
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from custom_components.duet3d.discovery import (
+    DuetAuthError,
+    async_detect_board,
+    async_probe_host,
+    async_scan_network,
+)
+
+# seconds to scan a /24
+MAX_SCAN_TIME = 5
+BOARDS = [{"name": "Duet 3 MB6HC", "firmwareVersion": "3.5.1"}]
+MODEL = {
+    "boards": BOARDS,
+    "heat": {"heaters": [{"current": 21.5}], "bedHeaters": [0]},
+    "job": {"file": {"fileName": None}, "layers": []},
+    "move": {"axes": []},
+    "state": {"status": "idle"},
+}
+
+
+def standalone_board(password=None):
+    """Return the app of a standalone board, optionally with a password."""
+    sessions = set()
+
+    async def rr_connect(request):
+        if password is None or request.query.get("password") == password:
+            sessions.add(request.remote)
+            return web.json_response({"err": 0, "sessionTimeout": 8000})
+        return web.json_response({"err": 1})
+
+    async def rr_model(request):
+        if password is not None and request.remote not in sessions:
+            # RepRapFirmware answers without a body
+            return web.Response(status=401)
+        key = request.query.get("key", "")
+        if key not in MODEL:
+            return web.json_response({"key": key, "flags": "", "result": None})
+        return web.json_response({"key": key, "result": MODEL[key]})
+
+    app = web.Application()
+    app.router.add_get("/rr_connect", rr_connect)
+    app.router.add_get("/rr_model", rr_model)
+    return app
+
+
+def sbc_board():
+    """Return the app of DSF, which also answers the rr_ requests."""
+
+    async def machine_status(request):
+        return web.json_response(MODEL)
+
+    app = standalone_board()
+    app.router.add_get("/machine/status", machine_status)
+    return app
+
+
+def other_server():
+    """Return the app of a web server that wants a login for everything."""
+
+    async def login(request):
+        return web.Response(status=401, text="<html>Login</html>")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", login)
+    return app
+
+
+async def start(app):
+    """Serve an app on a free port of 127.0.0.1, return the runner and port."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+async def probe(app):
+    runner, port = await start(app)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await async_probe_host(session, "127.0.0.1", port)
+    finally:
+        await runner.cleanup()
+
+
+def test_probe_standalone():
+    result = asyncio.run(probe(standalone_board()))
+    assert result == {
+        "host": "127.0.0.1",
+        "port": result["port"],
+        "standalone": True,
+        "board": "Duet 3 MB6HC",
+        "firmware": "3.5.1",
+    }
+
+
+def test_probe_sbc():
+    result = asyncio.run(probe(sbc_board()))
+    assert result["standalone"] is False
+    assert result["board"] == "Duet 3 MB6HC"
+
+
+def test_probe_password_protected():
+    """A board wanting a password is listed without its details."""
+    result = asyncio.run(probe(standalone_board(password="secret")))
+    assert result["standalone"] is True
+    assert result["board"] is None
+
+
+def test_probe_other_server():
+    """Other servers answering 401 are not listed."""
+    assert asyncio.run(probe(other_server())) is None
+
+
+def test_scan_network():
+    """A /24 is scanned within seconds, only hosts running a board are returned."""
+
+    async def run():
+        runner, port = await start(standalone_board())
+        try:
+            # the other hosts refuse, the server only listens on 127.0.0.1
+            start_time = time.monotonic()
+            boards = await async_scan_network("127.0.0.0/24", port)
+            return boards, time.monotonic() - start_time
+        finally:
+            await runner.cleanup()
+
+    boards, elapsed = asyncio.run(run())
+    assert [board["host"] for board in boards] == ["127.0.0.1"]
+    assert elapsed < MAX_SCAN_TIME
+
+
+async def detect(app, password=""):
+    runner, port = await start(app)
+    try:
+        return await async_detect_board(f"http://127.0.0.1:{port}", password)
+    finally:
+        await runner.cleanup()
+
+
+def test_detect_sbc():
+    capabilities = asyncio.run(detect(sbc_board()))
+    assert capabilities["api"] == "sbc"
+    assert capabilities["firmware"] == "3.5.1"
+
+
+def test_detect_password_protected():
+    capabilities = asyncio.run(detect(standalone_board("secret"), "secret"))
+    assert capabilities["api"] == "standalone"
+    assert capabilities["board"] == "Duet 3 MB6HC"
+
+    with pytest.raises(DuetAuthError):
+        asyncio.run(detect(standalone_board("secret"), "wrong"))
+    with pytest.raises(DuetAuthError):
+        asyncio.run(detect(standalone_board("secret")))
+
+
+def test_detect_other_server():
+    with pytest.raises(ValueError):
+        asyncio.run(detect(other_server()))
@@ -0,0 +1,214 @@
+"""Tests of the DSF socket client against a stand-in for dcs.sock."""
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+
+from custom_components.duet3d import dsf
+from custom_components.duet3d.dsf import (
+    DsfCommandClient,
+    DsfError,
+    async_subscribe,
+    get_filters,
+)
+
+MODEL = {"state": {"status": "idle"}, "heat": {"heaters": [{"current": 21.5}]}}
+
+
+class FakeDsf:
+    """Speaks DSF's protocol on a Unix socket, one handler per connection mode."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+        self.init_messages = []
+        self.commands = []
+        self.acknowledged = 0
+        # closes the next connection after this many messages
+        self.drop_after = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        decoder = json.JSONDecoder()
+        buffer = ""
+
+        async def receive():
+            nonlocal buffer
+            while True:
+                buffer = buffer.lstrip()
+                try:
+                    message, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    data = await reader.read(4096)
+                    if not data:
+                        raise ConnectionResetError
+                    buffer += data.decode()
+                    continue
+                buffer = buffer[end:]
+                return message
+
+        def send(message):
+            # split messages, DSF does not delimit them either
+            data = json.dumps(message).encode()
+            writer.write(data[:7])
+            writer.write(data[7:])
+
+        try:
+            send({"version": dsf.PROTOCOL_VERSION, "id": self.connections})
+            init = await receive()
+            self.init_messages.append(init)
+            if init["version"] != dsf.PROTOCOL_VERSION:
+                send({"success": False, "errorType": "IncompatibleVersionException"})
+                return
+            send({"success": True})
+            drop_after, self.drop_after = self.drop_after, None
+            sent = 0
+            if init["mode"] == "Command":
+                while drop_after is None or sent < drop_after:
+                    command = await receive()
+                    self.commands.append(command)
+                    if command["command"] == "SimpleCode":
+                        if command["code"].startswith("M999"):
+                            send(
+                                {
+                                    "success": False,
+                                    "errorType": "InvalidOperationException",
+                                    "errorMessage": "not allowed",
+                                }
+                            )
+                        else:
+                            send({"success": True, "result": f"ok {command['code']}"})
+                    elif command["command"] == "GetObjectModel":
+                        send({"success": True, "result": MODEL})
+                    sent += 1
+            else:
+                while drop_after is None or sent < drop_after:
+                    send(MODEL)
+                    sent += 1
+                    assert (await receive()) == {"command": "Acknowledge"}
+                    self.acknowledged += 1
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+def socket_path():
+    """Return a short socket path, Unix sockets have a path length limit."""
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "dcs.sock")
+
+
+def test_get_filters():
+    assert get_filters(["state", "job.file"]) == [
+        "state",
+        "state/**",
+        "job/file",
+        "job/file/**",
+    ]
+
+
+def test_command_mode(socket_path):
+    """Codes and object model requests share one command connection."""
+
+    async def run():
+        async with FakeDsf(socket_path) as server:
+            client = DsfCommandClient(socket_path)
+            assert await client.async_send_code("M115") == "ok M115"
+            assert await client.async_get_object_model() == MODEL
+            with pytest.raises(DsfError, match="not allowed"):
+                await client.async_send_code("M999")
+            await client.async_close()
+        return server
+
+    server = asyncio.run(run())
+    assert server.connections == 1
+    assert server.init_messages == [
+        {"mode": "Command", "version": dsf.PROTOCOL_VERSION}
+    ]
+    assert server.commands[0] == {
+        "command": "SimpleCode",
+        "code": "M115",
+        "channel": "SBC",
+    }
+
+
+def test_command_mode_reconnects(socket_path):
+    """A lost connection fails one command, the next one reconnects."""
+
+    async def run():
+        async with FakeDsf(socket_path) as server:
+            server.drop_after = 1
+            client = DsfCommandClient(socket_path)
+            assert await client.async_send_code("G28") == "ok G28"
+            with pytest.raises(OSError):
+                await client.async_send_code("G29")
+            assert await client.async_send_code("G30") == "ok G30"
+            await client.async_close()
+        return server
+
+    server = asyncio.run(run())
+    assert server.connections == 2
+
+
+def test_command_mode_without_dsf(socket_path):
+    """A missing socket raises OSError, which the services report."""
+
+    async def run():
+        client = DsfCommandClient(socket_path)
+        with pytest.raises(OSError):
+            await client.async_send_code("M115")
+
+    asyncio.run(run())
+
+
+def test_subscribe_mode_reconnects(socket_path, monkeypatch):
+    """Models are acknowledged and the subscription is reopened after errors."""
+    monkeypatch.setattr(dsf, "RECONNECT_DELAY", 0)
+    models = []
+    errors = []
+
+    async def run():
+        async with FakeDsf(socket_path) as server:
+            server.drop_after = 2
+            done = asyncio.Event()
+
+            async def on_model(model):
+                models.append(model)
+                if len(models) == 4:
+                    done.set()
+
+            task = asyncio.create_task(
+                async_subscribe(
+                    socket_path, lambda: ["state", "heat"], on_model, errors.append
+                )
+            )
+            await asyncio.wait_for(done.wait(), 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return server
+
+    server = asyncio.run(run())
+    assert models == [MODEL] * 4
+    assert server.connections == 2
+    assert server.acknowledged >= 3
+    assert len(errors) == 1 and isinstance(errors[0], OSError)
+    assert server.init_messages[0] == {
+        "mode": "Subscribe",
+        "subscriptionMode": "Full",
+        "filters": ["state", "state/**", "heat", "heat/**"],
+        "version": dsf.PROTOCOL_VERSION,
+    }
@@ -0,0 +1,19 @@
+"""Tests of the G-code file listing."""
+from custom_components.duet3d.file_list import FileListing
+
+
+def test_recent_files_are_capped():
+    """Only the files changed last are recent, all of them stay listed."""
+    listing = FileListing()
+    files = [
+        {"name": f"part{index}.gcode", "size": 1, "date": f"2024-01-{index:02d}"}
+        for index in range(1, 6)
+    ]
+    files.append({"name": "undated.gcode", "size": 1, "date": None})
+
+    listing.set_files(files, "token", 2)
+
+    assert listing.recent == ["part4.gcode", "part5.gcode"]
+    assert len(listing.names) == 6
+    assert "undated.gcode" in listing
+    assert listing.change_token == "token"
@@ -0,0 +1,67 @@
+"""Budget for the time it takes to import the integration."""
+import os
+import subprocess
+import sys
+
+PACKAGE = "custom_components.duet3d"
+# loaded by a running Home Assistant before the integration, not counted
+PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.components.http",
+    "homeassistant.components.sensor",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.update_coordinator",
+)
+MAX_IMPORT_TIME = 0.1  # s
+# only imported by the functions that need them, in the executor
+LAZY_MODULES = ("numpy", "PIL", "multiprocessing", "concurrent.futures.process")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_package():
+    """Import the package in a new interpreter, return its import times.
+
+    Returns the cumulative import time of the package in seconds and the
+    modules loaded while importing it.
+    """
+    code = "import {0}; import {1}".format(", ".join(PRELOADED), PACKAGE)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = None
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if not cumulative_us.strip().isdigit():
+            # the header line
+            continue
+        if name.strip() == PACKAGE and not name.startswith("  "):
+            cumulative = int(cumulative_us) / 1e6
+            break
+        modules.append(name.strip())
+    assert cumulative is not None, result.stderr
+    # the lines before the package's one are its imports, up to the preloads
+    last_preload = max(modules.index(module) for module in PRELOADED)
+    return cumulative, modules[last_preload + 1 :]
+
+
+def test_import_time():
+    """Importing the integration stays within MAX_IMPORT_TIME."""
+    # the first run writes the bytecode caches
+    import_package()
+    cumulative, modules = min(import_package() for _ in range(3))
+
+    lazy = [
+        module
+        for module in modules
+        if any(module == lazy or module.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    ]
+    assert not lazy
+    assert cumulative <= MAX_IMPORT_TIME, f"{PACKAGE} imported in {cumulative:.3f} s"
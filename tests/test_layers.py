@@ -0,0 +1,47 @@
+"""Tests of the incremental layer history fetch."""
+import asyncio
+import json
+import re
+
+import pytest
+
+from .common import async_make_coordinator
+
+LAYERS = [{"duration": 30.0 + index, "height": 0.2 * (index + 1)} for index in range(4)]
+MODEL = {"job": {"file": {"fileName": "0:/gcodes/part.gcode"}, "duration": 100}}
+
+
+async def fetch_layers(config_dir, held, available, honor_offset):
+    """Fetch the layers after the held ones, return the history."""
+    coordinator = await async_make_coordinator(config_dir)
+    offsets = []
+
+    async def async_request(method, url, priority, **kwargs):
+        offset = int(re.search(r"a(\d+)", url.rpartition("flags=")[2])[1])
+        offsets.append(offset)
+        layers = LAYERS[:available]
+        result = layers[offset:] if honor_offset else layers
+        return json.dumps({"result": result}).encode()
+
+    coordinator.async_request = async_request
+    history = coordinator.layer_history
+    history.check_job("0:/gcodes/part.gcode", 100)
+    history.extend(LAYERS[:held])
+    try:
+        await coordinator._async_fetch_new_layers(MODEL)
+    finally:
+        await coordinator.hass.async_stop(force=True)
+    assert offsets == [held]
+    return history
+
+
+@pytest.mark.parametrize("honor_offset", [True, False])
+@pytest.mark.parametrize(("held", "available"), [(0, 2), (1, 1), (1, 2), (1, 4)])
+def test_fetch_new_layers(tmp_path, held, available, honor_offset):
+    """Each layer is held once, whether or not the firmware honours the offset."""
+    history = asyncio.run(fetch_layers(tmp_path, held, available, honor_offset))
+
+    assert list(history.durations) == [
+        layer["duration"] for layer in LAYERS[:available]
+    ]
+    assert list(history.heights) == [layer["height"] for layer in LAYERS[:available]]
@@ -0,0 +1,131 @@
+"""Tests of the local G-code analysis."""
+import asyncio
+import hashlib
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duet3d.preflight import GcodeAnalyzer, load_parser
+
+parse_gcode_file = load_parser().parse_gcode_file
+
+HEADER = b"""; generated by PrusaSlicer 2.7.1+win64 on 2024-01-01 at 12:00:00 UTC
+;
+; thumbnail begin 16x16 8
+; iVBORw0K
+; thumbnail end
+;
+M83
+G92 E0
+"""
+FOOTER = b"""; filament used [mm] = 1234.56
+; estimated printing time (normal mode) = 1h 2m 3s
+; layer_height = 0.2
+"""
+# parsing must keep up with copying the file to the board over the network
+MIN_THROUGHPUT = 5  # MB/s
+BENCHMARK_SIZE = 32 * 1024 * 1024
+
+
+def write_gcode(path, size):
+    """Write a sliced-looking file of about size bytes, return its layer count."""
+    layer = 0
+    with open(path, "wb") as file:
+        file.write(HEADER)
+        written = len(HEADER)
+        while written < size:
+            layer += 1
+            lines = [b";LAYER_CHANGE\n", b"G1 Z%.2f F720\n" % (layer * 0.2)]
+            lines += [
+                b"G1 X%.3f Y%.3f E0.04512 ; perimeter\n" % (100 + step, 100 - step)
+                for step in range(500)
+            ]
+            chunk = b"".join(lines)
+            file.write(chunk)
+            written += len(chunk)
+        file.write(FOOTER)
+    return layer
+
+
+def test_parse_gcode_file(tmp_path):
+    """The slicer metadata and the moves end up in the file info."""
+    path = tmp_path / "part.gcode"
+    layers = write_gcode(path, 200_000)
+
+    info, content_hash, _ = parse_gcode_file(str(path))
+
+    assert info["generatedBy"] == (
+        "PrusaSlicer 2.7.1+win64 on 2024-01-01 at 12:00:00 UTC"
+    )
+    assert info["filament"] == [1234.56]
+    assert info["printTime"] == 3723
+    assert info["layerHeight"] == 0.2
+    assert info["numLayers"] == layers
+    assert info["height"] == round(layers * 0.2, 2)
+    assert info["thumbnails"] == [
+        {"format": "png", "width": 16, "height": 16, "size": 8, "data": "iVBORw0K"}
+    ]
+    digest = hashlib.blake2b(path.read_bytes(), digest_size=16)
+    assert content_hash == digest.hexdigest()
+
+
+def test_retractions_are_not_extrusion(tmp_path):
+    """Without slicer totals, retracted and restored filament is not counted."""
+    path = tmp_path / "retract.gcode"
+    path.write_bytes(
+        b"M82\nG92 E0\nG1 X10 Y10 E5\nG1 E3 F2400\nG1 X20 Z0.4\n"
+        b"G1 E5 F2400\nG1 X30 Y20 E7.5\nM83\nG1 E-0.8\nG1 E0.8\nG1 X40 E1\n"
+    )
+
+    info, _, _ = parse_gcode_file(str(path))
+
+    assert info["filament"] == [8.5]
+
+
+def test_parse_gcode_file_throughput(tmp_path):
+    """Large files are parsed at no less than MIN_THROUGHPUT."""
+    path = tmp_path / "large.gcode"
+    write_gcode(path, BENCHMARK_SIZE)
+    size = path.stat().st_size
+
+    start = time.perf_counter()
+    info, _, duration = parse_gcode_file(str(path))
+    elapsed = time.perf_counter() - start
+
+    throughput = size / elapsed / 1e6
+    assert info["numLayers"] > 0
+    assert duration <= elapsed
+    assert throughput >= MIN_THROUGHPUT
+
+
+def test_analyzer_workers_do_not_import_the_integration(tmp_path):
+    """The worker processes parse files without Home Assistant or the package."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        hass.config.allowlist_external_dirs = {str(tmp_path)}
+        analyzer = GcodeAnalyzer(hass)
+        path = tmp_path / "part.gcode"
+        layers = write_gcode(path, 100_000)
+        try:
+            first = await analyzer.async_analyze(str(path))
+            second = await analyzer.async_analyze(str(path))
+            modules = await asyncio.wrap_future(
+                analyzer._get_pool().submit(
+                    eval,
+                    "sorted(name for name in __import__('sys').modules"
+                    " if name.startswith(('homeassistant', 'custom_components')))",
+                )
+            )
+        finally:
+            analyzer.shutdown()
+            await hass.async_stop(force=True)
+        return layers, first, second, modules
+
+    layers, first, second, modules = asyncio.run(run())
+
+    assert first["numLayers"] == layers
+    assert first["fileName"] == "part.gcode"
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["hash"] == first["hash"]
+    assert modules == []
@@ -0,0 +1,52 @@
+"""Tests of the print history file."""
+import asyncio
+import os
+from types import SimpleNamespace
+
+from custom_components.duet3d.print_history import PrintHistory
+
+
+def make_hass(config_dir):
+    """Return the parts of Home Assistant the history uses."""
+
+    async def async_add_executor_job(target, *args):
+        return target(*args)
+
+    return SimpleNamespace(
+        config=SimpleNamespace(path=lambda *parts: os.path.join(config_dir, *parts)),
+        async_add_executor_job=async_add_executor_job,
+    )
+
+
+def test_remove_deletes_history_file(tmp_path):
+    """Removing the config entry deletes its history, once."""
+    os.makedirs(tmp_path / ".storage")
+    history = PrintHistory(make_hass(str(tmp_path)), "entry")
+    history._append({"ended": "2024-05-01T12:00:00+00:00"})
+    assert os.path.exists(tmp_path / ".storage" / "duet3d.entry.history.jsonl")
+
+    asyncio.run(history.async_remove())
+    asyncio.run(history.async_remove())
+
+    assert not os.listdir(tmp_path / ".storage")
+
+
+def test_job_counted_when_history_cannot_be_written(tmp_path):
+    """A job ending while the history file is not writable is still counted."""
+    history = PrintHistory(make_hass(str(tmp_path / "missing")), "entry")
+    job = {
+        "status": "processing",
+        "file_name": "0:/gcodes/part.gcode",
+        "duration": 60,
+        "filament": 12.34,
+        "layer": 3,
+        "cancelled": False,
+        "aborted": False,
+    }
+
+    asyncio.run(history.async_observe(job))
+    asyncio.run(history.async_observe({**job, "status": "idle"}))
+
+    assert history.totals["jobs"] == 1
+    assert history.totals["completed"] == 1
+    assert history.recent[-1]["filament"] == 12.3
@@ -0,0 +1,53 @@
+"""Tests of the object model queries."""
+import pytest
+
+from custom_components.duet3d.model import is_covered
+from custom_components.duet3d.query import compile_query, evaluate_query, get_query_key
+
+MODEL = {
+    "fans": [{"actualValue": 0.5}, None, {"actualValue": 1.0}],
+    "boards": [{"vIn": {"current": 24.1}}],
+    "sensors": {"analog": [{"lastReading": 21.0}, {"lastReading": 60.5}]},
+}
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("fans[*].actualValue", [0.5, 1.0]),
+        ("boards[0].vIn.current", 24.1),
+        ("sensors.analog[-1].lastReading", 60.5),
+        ("sensors.analog[0:1].lastReading", [21.0]),
+        ("inputs[*]", []),
+        ("boards[3].vIn", None),
+    ],
+)
+def test_evaluate_query(path, expected):
+    assert evaluate_query(path, MODEL) == expected
+
+
+def test_compile_query_rejects_invalid_paths():
+    with pytest.raises(ValueError):
+        compile_query("fans[::0]")
+    with pytest.raises(ValueError):
+        compile_query("fans[x]")
+
+
+@pytest.mark.parametrize(
+    ("path", "key"),
+    [
+        ("fans[*].actualValue", "fans"),
+        ("boards[0].vIn.current", "boards"),
+        ("sensors.analog[-1]", "sensors.analog"),
+        ("*.status", None),
+    ],
+)
+def test_get_query_key(path, key):
+    """The key to fetch is the leading member names of a query."""
+    assert get_query_key(path) == key
+
+
+def test_is_covered():
+    assert is_covered("sensors.analog", ["sensors"])
+    assert is_covered("heat.heaters[0]", ["heat.heaters"])
+    assert not is_covered("sensors.analog", ["sensors.gpIn", "sensorsX"])
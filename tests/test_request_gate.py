@@ -0,0 +1,86 @@
+"""Tests of the request gate."""
+import asyncio
+
+from custom_components.duet3d.request_gate import DuetRequestGate
+
+PRIORITY_GCODE = 0
+PRIORITY_TRANSFER = 4
+
+
+async def hold_transfer(gate, started, release):
+    """Hold a transfer slot until release is set."""
+    async with gate.transfer_slot(PRIORITY_TRANSFER):
+        started.append(asyncio.current_task())
+        await release.wait()
+
+
+def test_transfers_leave_a_slot_for_requests():
+    """Transfers wait for each other while other requests still get a slot."""
+
+    async def run():
+        gate = DuetRequestGate(2)
+        started = []
+        release = asyncio.Event()
+        transfers = [
+            asyncio.create_task(hold_transfer(gate, started, release))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        held = (len(started), gate.active, gate.transfers)
+
+        async def gcode():
+            async with gate.slot(PRIORITY_GCODE):
+                return gate.active
+
+        gcode_active = await asyncio.wait_for(gcode(), 1)
+        release.set()
+        await asyncio.gather(*transfers)
+        return held, gcode_active, len(started), gate.active, gate.transfers
+
+    held, gcode_active, started, active, transfers = asyncio.run(run())
+
+    assert held == (1, 1, 1)
+    assert gcode_active == 2
+    assert (started, active, transfers) == (2, 0, 0)
+
+
+def test_more_slots_start_waiting_transfers():
+    """Raising the limit lets the waiting transfers start."""
+
+    async def run():
+        gate = DuetRequestGate(2)
+        started = []
+        release = asyncio.Event()
+        transfers = [
+            asyncio.create_task(hold_transfer(gate, started, release))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        before = len(started)
+        gate.set_max_concurrent(3)
+        await asyncio.sleep(0)
+        after = len(started)
+        release.set()
+        await asyncio.gather(*transfers)
+        return before, after
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_cancelled_transfer_stops_waiting():
+    """A transfer cancelled while waiting does not count against the limit."""
+
+    async def run():
+        gate = DuetRequestGate(2)
+        started = []
+        release = asyncio.Event()
+        first = asyncio.create_task(hold_transfer(gate, started, release))
+        waiting = asyncio.create_task(hold_transfer(gate, started, release))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        release.set()
+        await first
+        return gate.transfers, gate.active, len(started)
+
+    assert asyncio.run(run()) == (0, 0, 1)
@@ -0,0 +1,136 @@
+"""Tests of the accelerometer capture and the resonance analysis."""
+import asyncio
+import math
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.duet3d import resonance
+from custom_components.duet3d.resonance import (
+    async_capture_accelerometer,
+    parse_accelerometer_csv,
+    process_resonance,
+)
+
+RESONANCES = {"X": 42.0, "Y": 57.0, "Z": 120.0}
+# a LIS3DH at its highest rate, for ten seconds
+BENCHMARK_RATE = 5376
+BENCHMARK_SECONDS = 10
+MAX_PROCESS_TIME = 2  # s
+
+
+def make_csv(rate, seconds):
+    """Return an M956 CSV with one resonance per axis over some noise."""
+    noise = random.Random(0)
+    lines = ["Sample,X,Y,Z"]
+    for sample in range(int(rate * seconds)):
+        t = sample / rate
+        values = (
+            math.sin(2 * math.pi * frequency * t) + noise.gauss(0, 0.2)
+            for frequency in RESONANCES.values()
+        )
+        lines.append(f"{sample}," + ",".join(f"{value:.3f}" for value in values))
+    lines.append(f"Rate {rate} overflows 0")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def test_parse_accelerometer_csv():
+    """Columns follow the header, malformed lines are skipped."""
+    data = (
+        b"Sample,X,Y\r\n0,0.5,1\r\n1,0.25,-1\r\nbad line\r\n2,0,2\r\n"
+        b"Rate 1344 overflows 0\r\n"
+    )
+
+    columns, rate = parse_accelerometer_csv(data)
+
+    assert rate == 1344
+    assert columns["X"].tolist() == [0.5, 0.25, 0]
+    assert columns["Y"].tolist() == [1, -1, 2]
+
+
+def test_process_resonance_benchmark(tmp_path):
+    """A multi-second high-rate capture is analyzed within MAX_PROCESS_TIME."""
+    data = make_csv(BENCHMARK_RATE, BENCHMARK_SECONDS)
+    image_path = str(tmp_path / "spectrum.png")
+
+    start = time.perf_counter()
+    result = process_resonance(data, image_path)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"analyzed {BENCHMARK_RATE * BENCHMARK_SECONDS} samples "
+        f"({len(data) / 1e6:.1f} MB) in {elapsed:.2f} s"
+    )
+    for axis, frequency in RESONANCES.items():
+        peak = result["axes"][axis]["peaks"][0]["frequency"]
+        assert peak == pytest.approx(frequency, abs=BENCHMARK_RATE / 1024)
+    with open(image_path, "rb") as image:
+        assert image.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert elapsed <= MAX_PROCESS_TIME
+
+
+class FakeCoordinator:
+    """Lists a capture that is still being written for a few polls."""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.listings = 0
+        self.gcodes = []
+
+    async def send_gcode(self, gcode, priority):
+        self.gcodes.append(gcode)
+
+    async def async_list_files(self, directory):
+        files = [{"name": "old.csv", "size": 100}]
+        if self.gcodes:
+            size = self.sizes[min(self.listings, len(self.sizes) - 1)]
+            self.listings += 1
+            if size is not None:
+                files.append({"name": "new.csv", "size": size})
+        return files
+
+
+def test_capture_waits_for_complete_file(monkeypatch):
+    """The path is only returned once the size of the new file is stable."""
+    monkeypatch.setattr(resonance, "CAPTURE_POLL_INTERVAL", 0)
+    coordinator = FakeCoordinator([None, 10, 2000, 4000, 4000])
+
+    path = asyncio.run(async_capture_accelerometer(coordinator, "0", 1000, 0))
+
+    assert path == f"{resonance.ACCELEROMETER_DIRECTORY}/new.csv"
+    assert coordinator.gcodes == ["M956 P0 S1000 A0"]
+    assert coordinator.listings == 5
+
+
+def test_download_retries_until_rate_line(monkeypatch):
+    """A download without the summary line is repeated."""
+    monkeypatch.setattr(resonance, "CAPTURE_POLL_INTERVAL", 0)
+    bodies = [b"Sample,X\n0,1\n", b"Sample,X\n0,1\n1,2\nRate 1344 overflows 0\n"]
+
+    class Stream:
+        def __init__(self, body):
+            self.content = SimpleNamespace(iter_chunked=lambda size: chunks(body))
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    async def chunks(body):
+        yield body
+
+    coordinator = SimpleNamespace(
+        config_entry=SimpleNamespace(data={"standalone": True}),
+        base_url="http://printer",
+        async_stream=lambda method, url, priority, params: Stream(bodies.pop(0)),
+    )
+
+    data = asyncio.run(
+        resonance.async_download_accelerometer_csv(coordinator, "0:/sys/x.csv")
+    )
+
+    assert data.endswith(b"Rate 1344 overflows 0\n")
+    assert not bodies
@@ -0,0 +1,49 @@
+"""Tests of the service calls."""
+import asyncio
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.duet3d.const import DOMAIN
+from custom_components.duet3d.services import async_register_services
+
+from .common import async_make_coordinator
+
+
+async def async_call(coordinator, service, data):
+    """Call a service of the integration for the coordinator's printer."""
+    hass = coordinator.hass
+    hass.data[DOMAIN] = {"entry": {"coordinator": coordinator}}
+    async_register_services(hass, coordinator.config_entry)
+    return await hass.services.async_call(
+        DOMAIN, service, data, blocking=True, return_response=True
+    )
+
+
+def test_resonance_image_in_missing_directory(tmp_path):
+    """The image path is checked before the capture starts."""
+
+    async def run():
+        coordinator = await async_make_coordinator(tmp_path)
+        gcodes = []
+
+        async def send_gcode(gcode, priority=None):
+            gcodes.append(gcode)
+
+        coordinator.send_gcode = send_gcode
+        try:
+            with pytest.raises(HomeAssistantError, match="does not exist"):
+                await async_call(
+                    coordinator,
+                    "analyze_resonance",
+                    {"image": str(tmp_path / "missing" / "spectrum.png")},
+                )
+            with pytest.raises(HomeAssistantError, match="not inside"):
+                await async_call(
+                    coordinator, "analyze_resonance", {"image": "/spectrum.png"}
+                )
+        finally:
+            await coordinator.hass.async_stop(force=True)
+        assert not gcodes
+
+    asyncio.run(run())